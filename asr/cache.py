@@ -0,0 +1,87 @@
+"""Fun-ASR 内存缓存基类
+
+按占用字节数做 LRU 淘汰的线程安全缓存，供前缀 KV 缓存、编码器输出缓存等复用。
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """按内存上限做 LRU 淘汰的缓存
+
+    Attributes:
+        max_bytes: 缓存占用的最大字节数
+        nbytes: 当前占用的字节数
+        hits: 命中次数
+        misses: 未命中次数
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """初始化缓存
+
+        Args:
+            max_bytes: 缓存占用的最大字节数
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sizeof(self, value) -> int:
+        """计算缓存值占用的字节数，子类按值的类型实现"""
+        return value.nbytes
+
+    def get(self, key):
+        """查询缓存，未命中时返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """写入缓存，超过上限时淘汰最久未使用的条目
+
+        Returns:
+            写入的值
+        """
+        nbytes = self.sizeof(value)
+        if nbytes > self.max_bytes:
+            return value
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            while self._entries and self.nbytes + nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __deepcopy__(self, memo):
+        # 缓存在多次推理之间共享，复制推理参数时不复制缓存本身
+        return self
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(entries={len(self)}, nbytes={self.nbytes}, "
+            f"hits={self.hits}, misses={self.misses})"
+        )
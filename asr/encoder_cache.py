@@ -0,0 +1,114 @@
+"""Fun-ASR 编码器输出缓存
+
+同一批录音经常需要用新的热词列表、不同的语言或 itn 设置重新解码，
+而这些参数只影响 adaptor 之后的 LLM 部分。这里按 (模型版本, 音频内容哈希)
+缓存音频编码器的输出，重新解码时跳过音频加载、特征提取与编码器。
+
+内存中按 LRU 淘汰；指定 cache_dir 时同时写入磁盘，磁盘目录超过上限时删除最久未访问的文件。
+"""
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+
+import torch
+
+from .cache import LRUCache
+
+
+class EncoderCache(LRUCache):
+    """编码器输出缓存
+
+    Attributes:
+        cache_dir: 磁盘缓存目录，None 表示只使用内存
+        max_disk_bytes: 磁盘缓存的最大字节数
+        disk_hits: 内存未命中、从磁盘读取的次数
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 512 * 1024 * 1024,
+        cache_dir: str = None,
+        max_disk_bytes: int = 4 * 1024 * 1024 * 1024,
+    ):
+        """初始化编码器输出缓存
+
+        Args:
+            max_bytes: 内存缓存的最大字节数
+            cache_dir: 磁盘缓存目录
+            max_disk_bytes: 磁盘缓存的最大字节数
+        """
+        super().__init__(max_bytes=max_bytes)
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_hits = 0
+        # 磁盘文件 -> 字节数，按最近访问顺序排列；只在初始化时扫描一次目录
+        self._disk_files = OrderedDict()
+        self._disk_bytes = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            files = []
+            for entry in os.scandir(cache_dir):
+                if entry.name.endswith(".pt"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.path, stat.st_size))
+            for _, path, size in sorted(files):
+                self._disk_files[path] = size
+                self._disk_bytes += size
+
+    def get(self, key):
+        """查询缓存，依次查找内存与磁盘，未命中时返回 None"""
+        value = super().get(key)
+        if value is not None or self.cache_dir is None:
+            return value
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            value = torch.load(path, map_location="cpu")
+        except Exception as e:
+            logging.warning(f"读取编码器缓存失败: {path}, {e}")
+            return None
+        os.utime(path)
+        if path in self._disk_files:
+            self._disk_files.move_to_end(path)
+        self.disk_hits += 1
+        return super().put(key, value)
+
+    def put(self, key, value: torch.Tensor) -> torch.Tensor:
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 编码器输出 [T, D]
+
+        Returns:
+            torch.Tensor: 写入的（CPU 上的）编码器输出
+        """
+        value = value.detach().cpu()
+        super().put(key, value)
+        if self.cache_dir is not None:
+            path = self._path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            torch.save(value, tmp_path)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            self._disk_bytes += size - self._disk_files.pop(path, 0)
+            self._disk_files[path] = size
+            self._evict_disk()
+        return value
+
+    def _path(self, key) -> str:
+        name = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.pt")
+
+    def _evict_disk(self):
+        """磁盘缓存超过上限时删除最久未访问的文件"""
+        while self._disk_bytes > self.max_disk_bytes and self._disk_files:
+            path, size = self._disk_files.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,77 @@
+"""批量 fbank 前端基准
+
+把音频切成若干条短片段，分别逐条调用 extract_fbank 与一次调用
+FunASRNano.fbank_batch 计算特征，输出耗时与两者特征的最大误差。
+
+用法:
+    python bench_frontend.py <音频文件> [--clip-seconds 2] [--num-clips 64] [--device cpu]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+import torch
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr import FunASR
+from funasr.utils.load_utils import extract_fbank
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量 fbank 前端基准")
+    parser.add_argument("audio")
+    parser.add_argument("--clip-seconds", type=float, default=2.0)
+    parser.add_argument("--num-clips", type=int, default=64)
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    asr = FunASR(device=args.device, load_llm=False)
+    model, kwargs = asr._load_direct_model()
+    frontend, device = kwargs["frontend"], kwargs.get("device", "cpu")
+    waveform = asr._load_waveform(args.audio)
+    clip_len = int(args.clip_seconds * frontend.fs)
+    # 长度各不相同的片段，循环取自原音频
+    clips = []
+    for i in range(args.num_clips):
+        length = clip_len // 2 + (i * 7919) % clip_len
+        start = (i * clip_len) % max(1, waveform.shape[0] - length)
+        clips.append(waveform[start : start + length])
+
+    def per_clip():
+        return [
+            extract_fbank([clip], data_type="sound", frontend=frontend, is_final=True)
+            for clip in clips
+        ]
+
+    def batched():
+        speech, speech_lengths = model.fbank_batch(clips, frontend, device)
+        if speech.is_cuda:
+            torch.cuda.synchronize()
+        return speech, speech_lengths
+
+    for name, fn in [("per-clip", per_clip), ("batched", batched)]:
+        fn()  # 预热
+        begin = time.perf_counter()
+        for _ in range(args.repeat):
+            fn()
+        print(f"{name:>9}: {(time.perf_counter() - begin) / args.repeat * 1000:.1f} ms")
+
+    # 去掉抖动后比较特征
+    dither, frontend.dither = frontend.dither, 0.0
+    reference = per_clip()
+    speech, speech_lengths = batched()
+    frontend.dither = dither
+    max_err = max(
+        (ref[0][0] - speech[i, : speech_lengths[i]].cpu()).abs().max().item()
+        for i, ref in enumerate(reference)
+    )
+    print(f"最大误差: {max_err:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""int8 动态量化精度与速度基准（CPU）
+
+分别加载 fp32 与 int8 量化模型识别同一批音频，输出字错误率 (CER) 与实时率 (RTF)。
+参考集为每行 "音频路径<TAB>参考文本" 的文件；不带参考文本时以 fp32 结果为参考，
+CER 即量化带来的差异。
+
+用法:
+    python bench_quantize.py <参考集.tsv> [--modules llm audio_adaptor ctc_decoder]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+import soundfile as sf
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr import FunASR
+
+
+def edit_distance(ref: str, hyp: str) -> int:
+    """字级编辑距离"""
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1]
+
+
+def normalize(text: str) -> str:
+    """去掉空白与标点，只比较字符"""
+    return "".join(c for c in text if c.isalnum())
+
+
+def run(asr, items, language):
+    """识别全部音频，返回 (识别结果列表, 总耗时)"""
+    asr.transcribe(items[0][0], language=language)  # 预热
+    begin = time.perf_counter()
+    texts = [asr.transcribe(path, language=language) for path, _ in items]
+    return texts, time.perf_counter() - begin
+
+
+def cer(refs, hyps) -> float:
+    errors = sum(edit_distance(normalize(r), normalize(h)) for r, h in zip(refs, hyps))
+    return errors / max(sum(len(normalize(r)) for r in refs), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="int8 动态量化精度与速度基准")
+    parser.add_argument("reference", help="参考集文件，每行: 音频路径<TAB>参考文本（文本可省略）")
+    parser.add_argument("--language", default="中文")
+    parser.add_argument("--modules", nargs="+", default=["llm"])
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.threads is not None:
+        import torch
+
+        torch.set_num_threads(args.threads)
+
+    items = []
+    with open(args.reference, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                path, _, text = line.partition("\t")
+                items.append((path, text))
+    duration = sum(sf.info(path).duration for path, _ in items)
+
+    print("正在加载 fp32 模型...")
+    asr = FunASR(device="cpu")
+    fp32_texts, fp32_time = run(asr, items, args.language)
+    del asr
+
+    print(f"正在加载 int8 模型（量化 {', '.join(args.modules)}）...")
+    begin = time.perf_counter()
+    asr = FunASR(device="cpu", quantize="int8", quantize_modules=tuple(args.modules))
+    print(f"量化模型加载耗时: {time.perf_counter() - begin:.1f}s")
+    int8_texts, int8_time = run(asr, items, args.language)
+
+    refs = [text if text else fp32 for (_, text), fp32 in zip(items, fp32_texts)]
+    print(f"音频总时长: {duration:.1f}s, 共 {len(items)} 条")
+    print(f"{'model':>6} {'CER':>8} {'RTF':>8}")
+    print(f"{'fp32':>6} {cer(refs, fp32_texts):>8.2%} {fp32_time / duration:>8.3f}")
+    print(f"{'int8':>6} {cer(refs, int8_texts):>8.2%} {int8_time / duration:>8.3f}")
+    print(f"int8 与 fp32 结果不一致: {sum(a != b for a, b in zip(fp32_texts, int8_texts))} 条, "
+          f"加速比 {fp32_time / int8_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
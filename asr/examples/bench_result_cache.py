@@ -0,0 +1,45 @@
+"""识别结果缓存基准
+
+启用结果缓存后对同一目录连续转写两遍，模拟流水线重跑：
+第一遍全部未命中并写入缓存，第二遍应全部命中且不经过模型。
+
+用法:
+    python bench_result_cache.py <音频目录> [--cache results.db] [--device cpu]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr import FunASR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="识别结果缓存基准")
+    parser.add_argument("directory")
+    parser.add_argument("--cache", default="results.db")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--device", default=None)
+    args = parser.parse_args()
+
+    asr = FunASR(device=args.device, result_cache_path=args.cache)
+    cache = asr.result_cache
+    for run in range(2):
+        hits, misses = cache.hits, cache.misses
+        begin = time.perf_counter()
+        results = list(asr.transcribe_files(args.directory, batch_size=args.batch_size))
+        elapsed = time.perf_counter() - begin
+        cache.flush()
+        print(
+            f"第 {run + 1} 遍: {len(results)} 个文件 {elapsed:.2f}s，"
+            f"命中 {cache.hits - hits}，未命中 {cache.misses - misses}"
+        )
+    print(f"{cache}，缓存条目 {len(cache)}")
+
+
+if __name__ == "__main__":
+    main()
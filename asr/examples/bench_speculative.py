@@ -0,0 +1,64 @@
+"""CTC 草稿推测解码基准
+
+对同一批音频分别用普通贪心解码与 CTC 草稿推测解码识别，
+输出草稿接受率、解码步数缩减倍数与实际耗时加速比，并检查两者结果是否一致。
+
+用法:
+    python bench_speculative.py <音频文件> [<音频文件> ...] [--device cuda:0] [--num-draft-tokens 16]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr import FunASR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CTC 草稿推测解码基准")
+    parser.add_argument("audio", nargs="+")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--language", default="中文")
+    parser.add_argument("--num-draft-tokens", type=int, default=16)
+    args = parser.parse_args()
+
+    print("正在初始化 Fun-ASR...")
+    asr = FunASR(model_name="FunAudioLLM/Fun-ASR-Nano-2512", device=args.device)
+    asr.model.kwargs["num_draft_tokens"] = args.num_draft_tokens
+    # 预热
+    asr.transcribe_file(args.audio[0], language=args.language)
+
+    print(f"{'audio':>24} {'dur(s)':>7} {'greedy(s)':>10} {'spec(s)':>8} "
+          f"{'accept':>7} {'steps':>6} {'speedup':>8} {'same':>5}")
+    total_greedy = total_spec = 0.0
+    for audio_path in args.audio:
+        begin = time.perf_counter()
+        greedy = asr.transcribe_file(audio_path, language=args.language)
+        greedy_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        spec = asr.transcribe_file(audio_path, language=args.language, speculative=True)
+        spec_time = time.perf_counter() - begin
+
+        total_greedy += greedy_time
+        total_spec += spec_time
+        stats = spec.get("speculative", {})
+        draft_tokens = max(stats.get("draft_tokens", 0), 1)
+        steps = stats.get("decode_steps", 0)
+        print(
+            f"{os.path.basename(audio_path)[-24:]:>24} {greedy['duration']:>7.2f} "
+            f"{greedy_time:>10.3f} {spec_time:>8.3f} "
+            f"{stats.get('accepted_tokens', 0) / draft_tokens:>7.1%} "
+            f"{steps:>6} {(stats.get('new_tokens', 0) + 1) / max(steps, 1):>7.1f}x "
+            f"{str(greedy['text'] == spec['text']):>5}"
+        )
+    print(f"总耗时: 贪心 {total_greedy:.3f}s, 推测 {total_spec:.3f}s, "
+          f"加速比 {total_greedy / total_spec:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
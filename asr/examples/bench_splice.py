@@ -0,0 +1,108 @@
+"""语音嵌入拼接微基准
+
+对比原实现（逐条 .item() 循环写入）与 splice_speech_embeds 的两种拼接方式：
+一次 index_copy_（默认）与逐段切片拷贝（method="slice"）。
+不需要加载模型，使用随机张量模拟 batch 1/8/32 的输入。
+
+用法:
+    python bench_splice.py [--device cpu] [--repeat 50]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+import torch
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr.tools.utils import splice_speech_embeds
+
+
+def splice_loop(inputs_embeds, speech_embeds, fbank_beg, fake_token_len):
+    """原实现：按 batch、turn 逐条写入"""
+    speech_idx = 0
+    for batch_idx in range(inputs_embeds.shape[0]):
+        for turn_id in range(fbank_beg.shape[1]):
+            fbank_beg_idx = fbank_beg[batch_idx, turn_id].item()
+            if fbank_beg_idx > 0:
+                speech_token_len = fake_token_len[batch_idx, turn_id]
+                inputs_embeds[
+                    batch_idx, fbank_beg_idx : fbank_beg_idx + speech_token_len, :
+                ] = speech_embeds[speech_idx, :speech_token_len, :]
+                speech_idx += 1
+    return inputs_embeds
+
+
+def make_inputs(batch_size, turns, device, dim=1024, prompt_len=40, max_speech=200):
+    """构造随机输入：每条样本 turns 轮，每轮 prompt + 语音占位"""
+    speech_lens = torch.randint(max_speech // 2, max_speech + 1, (batch_size, turns))
+    fbank_beg = torch.zeros(batch_size, turns, dtype=torch.int32)
+    token_num = turns * (prompt_len + max_speech)
+    for b in range(batch_size):
+        pos = 0
+        for t in range(turns):
+            pos += prompt_len
+            fbank_beg[b, t] = pos
+            pos += int(speech_lens[b, t])
+    speech_embeds = torch.randn(batch_size * turns, max_speech, dim)
+    return (
+        torch.randn(batch_size, token_num, dim, device=device),
+        speech_embeds.to(device),
+        speech_lens.reshape(-1).to(device),
+        fbank_beg.to(device),
+        speech_lens.to(torch.int32).to(device),
+    )
+
+
+def timeit(fn, repeat, device):
+    fn()
+    if device.startswith("cuda"):
+        torch.cuda.synchronize()
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    if device.startswith("cuda"):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - begin) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语音嵌入拼接微基准")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=1)
+    args = parser.parse_args()
+
+    methods = ["slice", "index_copy"]
+    print(f"{'batch':>6} {'item loop (ms)':>15} " + " ".join(f"{m + ' (ms)':>16}" for m in methods))
+    for batch_size in [1, 8, 32]:
+        embeds, speech, speech_lens, fbank_beg, fake_token_len = make_inputs(
+            batch_size, args.turns, args.device
+        )
+        expected = splice_loop(embeds.clone(), speech, fbank_beg, fake_token_len)
+        loop_ms = timeit(
+            lambda: splice_loop(embeds, speech, fbank_beg, fake_token_len), args.repeat, args.device
+        )
+        times = []
+        for method in methods:
+            actual = splice_speech_embeds(
+                embeds.clone(), speech, speech_lens, fbank_beg, fake_token_len, method=method
+            )
+            assert torch.equal(expected, actual), f"{method} 结果不一致"
+            times.append(
+                timeit(
+                    lambda: splice_speech_embeds(
+                        embeds, speech, speech_lens, fbank_beg, fake_token_len, method=method
+                    ),
+                    args.repeat,
+                    args.device,
+                )
+            )
+        print(f"{batch_size:>6} {loop_ms:>15.3f} " + " ".join(f"{t:>16.3f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""时间戳计算开销基准
+
+对同一批音频分别以 timestamps="none" / "ctc" / "llm" / "both" 识别，
+输出每条音频的平均耗时以及相对 "none" 增加的时间戳计算开销。
+
+用法:
+    python bench_timestamps.py <音频文件> [<音频文件> ...] [--device cuda:0] [--repeat 3]
+"""
+
+import argparse
+import sys
+import os
+import time
+
+import torch
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr import FunASR
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间戳计算开销基准")
+    parser.add_argument("audio", nargs="+")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--language", default="中文")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print("正在初始化 Fun-ASR...")
+    asr = FunASR(model_name="FunAudioLLM/Fun-ASR-Nano-2512", device=args.device)
+    model, kwargs = asr._load_direct_model()
+    # 预先编码，只比较解码与后处理
+    encoded = asr.encode(args.audio)
+
+    def run(option):
+        begin = time.perf_counter()
+        for _ in range(args.repeat):
+            for item in encoded:
+                with torch.no_grad():
+                    model.inference(
+                        [item],
+                        **{**kwargs, "language": args.language, "timestamps": option},
+                    )
+        return (time.perf_counter() - begin) / args.repeat / len(encoded) * 1000
+
+    run("both")  # 预热
+    print(f"{'timestamps':>10} {'ms/utt':>10} {'overhead(ms)':>14}")
+    baseline = run("none")
+    print(f"{'none':>10} {baseline:>10.2f} {0.0:>14.2f}")
+    for option in ["ctc", "llm", "both"]:
+        elapsed = run(option)
+        print(f"{option:>10} {elapsed:>10.2f} {elapsed - baseline:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
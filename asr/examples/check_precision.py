@@ -0,0 +1,58 @@
+"""LLM 精度配置检查
+
+以指定的精度配置加载模型，连续识别多次，检查 LLM 参数的存储与精度在请求之间
+没有发生变化（推理路径中不应转换权重），并检查与加载精度不一致的请求会被拒绝。
+
+用法:
+    python check_precision.py <音频文件> [--llm-dtype bf16_autocast] [--device cpu]
+"""
+
+import argparse
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr import FunASR
+
+
+def snapshot(llm) -> dict:
+    """记录每个参数的存储地址与精度"""
+    return {name: (p.data_ptr(), p.dtype) for name, p in llm.named_parameters()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 精度配置检查")
+    parser.add_argument("audio")
+    parser.add_argument("--llm-dtype", default="fp32")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    asr = FunASR(device=args.device, llm_dtype=args.llm_dtype)
+    model, kwargs = asr._load_direct_model()
+    before = snapshot(model.llm)
+
+    for mode in ["llm", "ctc"]:
+        for _ in range(args.repeat):
+            print(f"[{mode}] {asr.transcribe(args.audio, mode=mode)}")
+    asr.transcribe(args.audio, speculative=True)
+
+    # 与加载精度不一致的请求应被拒绝，且不能修改权重
+    compute_dtype = model.resolve_llm_dtype()
+    other = "fp16" if compute_dtype != "fp16" else "bf16"
+    try:
+        model.inference([args.audio], **{**kwargs, "llm_dtype": other})
+        raise AssertionError(f"llm_dtype={other} 的请求没有被拒绝")
+    except ValueError as e:
+        print(f"已拒绝: {e}")
+
+    after = snapshot(model.llm)
+    changed = [name for name in before if before[name] != after[name]]
+    assert not changed, f"{len(changed)} 个 LLM 参数在推理中被修改，如 {changed[:3]}"
+    print(f"通过: {len(before)} 个 LLM 参数的存储与精度 ({args.llm_dtype}) 在请求之间保持不变")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Fun-ASR 推送式实时识别示例
+
+模拟实时音频源：把音频文件切成 100ms 的 16-bit PCM 帧逐帧推送，
+演示 create_session / feed / flush 接口。
+"""
+
+import sys
+import os
+
+import soundfile as sf
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from asr import FunASR
+
+
+def main():
+    """推送式实时识别示例"""
+
+    if len(sys.argv) < 2:
+        print("用法: python demo_live.py <音频文件路径>")
+        return
+
+    audio_path = sys.argv[1]
+    if not os.path.exists(audio_path):
+        print(f"错误: 文件不存在 - {audio_path}")
+        return
+
+    print("正在初始化 Fun-ASR...")
+    asr = FunASR(model_name="FunAudioLLM/Fun-ASR-Nano-2512")
+    print(f"模型加载完成: {asr}")
+
+    info = sf.info(audio_path)
+    session = asr.create_session(
+        language="中文",
+        sample_rate=info.samplerate,
+        channels=info.channels,
+    )
+
+    print(f"\n开始实时识别: {audio_path}")
+    print("-" * 50)
+
+    frame_size = info.samplerate // 10  # 100ms
+    for pcm in sf.blocks(audio_path, blocksize=frame_size, dtype="int16"):
+        result = session.feed(pcm.tobytes())
+        if result:
+            print(f"[{result['audio_duration']:6.2f}s] {result['text']} "
+                  f"(耗时 {result['latency'] * 1000:.0f}ms)")
+
+    result = session.flush()
+    print("-" * 50)
+    print(f"最终结果: {result['text']}")
+
+
+if __name__ == "__main__":
+    main()
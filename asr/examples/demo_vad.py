@@ -54,6 +54,14 @@ def main():
         print(f"\n规整后文本:\n{result['text_tn']}")
     
     print("-" * 50)
+    
+    # 长音频：VAD 只运行一次，语音片段按时长分批并行解码
+    print("\n长音频批量识别:")
+    result = asr.transcribe_long(audio_path, language="中文", batch_size=8)
+    for segment in result["segments"]:
+        print(f"[{segment['start']:8.2f} - {segment['end']:8.2f}] {segment['text']}")
+    
+    print("-" * 50)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+"""Fun-ASR 音频编码部分导出
+
+把 FunASRNano 的音频编码器、adaptor 与 CTC 头导出为 ONNX（或 TorchScript）计算图，
+batch 与时间维均为动态维度，供 ONNX Runtime 等推理引擎运行。
+LLM 部分不导出，仍由 PyTorch 运行。
+
+funasr 中 adaptor 的 forward 以 Python 整数计算补齐长度与掩码，
+导出时会被固化为示例输入的长度，这里改用张量运算重写。
+
+用法:
+    python -m asr.export --output encoder.onnx [--no-adaptor] [--no-ctc] [--format torchscript]
+"""
+
+import argparse
+import logging
+import os
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+
+def adaptor_forward(adaptor, x: torch.Tensor, ilens: torch.Tensor):
+    """funasr Transformer adaptor 的前向计算，补齐长度与掩码均由张量运算得到
+
+    Args:
+        adaptor: funasr.models.llm_asr.adaptor.Transformer 实例
+        x: 输入 [B, T, D]
+        ilens: 输入长度 [B]
+
+    Returns:
+        tuple: (输出 [B, T', D'], 输出长度 [B])
+    """
+    batch_size, seq_len, dim = x.shape
+    chunk_num = (seq_len - 1) // adaptor.k + 1
+    x = F.pad(x, (0, 0, 0, chunk_num * adaptor.k - seq_len, 0, 0), value=0.0)
+    x = x.reshape(batch_size, chunk_num, dim * adaptor.k)
+    x = adaptor.linear2(adaptor.relu(adaptor.linear1(x)))
+
+    olens = (ilens - 1) // adaptor.k + 1
+    positions = torch.arange(x.shape[1], device=x.device)
+    masks = (positions[None, :] < olens[:, None])[:, None, :]
+    if adaptor.blocks is not None:
+        for block in adaptor.blocks:
+            x, masks = block(x, masks)
+    return x, olens
+
+
+class AudioEncoderExport(nn.Module):
+    """音频编码部分的导出封装
+
+    输入 fbank 特征 speech [B, T, 560] 与长度 speech_lengths [B]，输出依次为
+    encoder_out、encoder_out_lens，以及可选的 adaptor_out、adaptor_out_lens、ctc_logits。
+    """
+
+    def __init__(self, model, with_adaptor: bool = True, with_ctc: bool = True):
+        super().__init__()
+        self.audio_encoder = model.audio_encoder
+        self.audio_adaptor = model.audio_adaptor if with_adaptor else None
+        self.ctc_decoder = model.ctc_decoder if with_ctc else None
+        self.ctc = model.ctc if with_ctc else None
+
+    def output_names(self) -> list:
+        names = ["encoder_out", "encoder_out_lens"]
+        if self.audio_adaptor is not None:
+            names += ["adaptor_out", "adaptor_out_lens"]
+        if self.ctc_decoder is not None:
+            names += ["ctc_logits"]
+        return names
+
+    def forward(self, speech: torch.Tensor, speech_lengths: torch.Tensor):
+        # 编码器会原地缩放输入
+        encoder_out, encoder_out_lens = self.audio_encoder(speech.clone(), speech_lengths)
+        outputs = [encoder_out, encoder_out_lens]
+        if self.audio_adaptor is not None:
+            outputs += list(adaptor_forward(self.audio_adaptor, encoder_out, encoder_out_lens))
+        if self.ctc_decoder is not None:
+            decoder_out, _ = adaptor_forward(self.ctc_decoder, encoder_out, encoder_out_lens)
+            outputs.append(self.ctc.log_softmax(decoder_out))
+        return tuple(outputs)
+
+
+def export_audio_encoder(
+    model,
+    output_path: str,
+    format: str = "onnx",
+    with_adaptor: bool = True,
+    with_ctc: bool = True,
+    opset_version: int = 17,
+) -> str:
+    """导出音频编码器（及 adaptor、CTC 头）
+
+    Args:
+        model: FunASRNano 模型
+        output_path: 输出文件路径
+        format: "onnx" 或 "torchscript"
+        with_adaptor: 是否包含 adaptor
+        with_ctc: 是否包含 CTC 头（需要模型带 CTC 解码器）
+        opset_version: ONNX opset 版本
+
+    Returns:
+        str: 输出文件路径
+    """
+    if format not in ("onnx", "torchscript"):
+        raise ValueError(f"不支持的导出格式: {format}，可选: \"onnx\", \"torchscript\"")
+    wrapper = AudioEncoderExport(
+        model, with_adaptor=with_adaptor, with_ctc=with_ctc and model.ctc_decoder is not None
+    ).float().eval().cpu()
+
+    # 示例输入：两条不等长的 fbank 特征
+    speech = torch.randn(2, 100, 560)
+    speech_lengths = torch.tensor([100, 60], dtype=torch.int64)
+    output_names = wrapper.output_names()
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    with torch.no_grad():
+        if format == "torchscript":
+            traced = torch.jit.trace(wrapper, (speech, speech_lengths), check_trace=False)
+            traced.save(output_path)
+        else:
+            dynamic_axes = {
+                "speech": {0: "batch_size", 1: "feats_length"},
+                "speech_lengths": {0: "batch_size"},
+            }
+            for name in output_names:
+                dynamic_axes[name] = {0: "batch_size"} if name.endswith("_lens") else {
+                    0: "batch_size",
+                    1: "frames",
+                }
+            torch.onnx.export(
+                wrapper,
+                (speech, speech_lengths),
+                output_path,
+                input_names=["speech", "speech_lengths"],
+                output_names=output_names,
+                dynamic_axes=dynamic_axes,
+                opset_version=opset_version,
+                dynamo=False,
+            )
+    logging.info(f"已导出 {format}: {output_path}，输出: {output_names}")
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出 Fun-ASR 音频编码器、adaptor 与 CTC 头")
+    parser.add_argument("--model", default="FunAudioLLM/Fun-ASR-Nano-2512")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--format", default="onnx", choices=["onnx", "torchscript"])
+    parser.add_argument("--no-adaptor", action="store_true")
+    parser.add_argument("--no-ctc", action="store_true")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--hub", default="ms")
+    args = parser.parse_args()
+
+    from .fun_asr import FunASR
+
+    asr = FunASR(model_name=args.model, device="cpu", hub=args.hub, load_llm=False)
+    model, _ = asr._load_direct_model()
+    export_audio_encoder(
+        model,
+        args.output,
+        format=args.format,
+        with_adaptor=not args.no_adaptor,
+        with_ctc=not args.no_ctc,
+        opset_version=args.opset,
+    )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,192 @@
+"""Fun-ASR 批量 fbank 前端
+
+funasr 的 WavFrontend 逐条音频调用 kaldi fbank 并在 Python 中做 LFR 拼帧，
+批次较大时逐条处理的开销明显。这里把一批音频右填充成 [B, N] 后一次完成
+分帧、FFT、mel 滤波、LFR 与 CMVN，可在模型所在设备上运行，
+输出的 [B, T, D] 特征与长度可直接交给 FunASRNano.encode。
+
+计算与 torchaudio.compliance.kaldi.fbank（snip_edges=True）+ funasr apply_lfr / apply_cmvn
+逐条结果一致（浮点误差以内）。
+"""
+
+import math
+
+import torch
+import torch.nn.functional as F
+
+
+def mel_banks(num_bins: int, padded_window_size: int, sample_freq: float, low_freq: float = 20.0):
+    """kaldi mel 三角滤波器组
+
+    Args:
+        num_bins: mel 滤波器个数
+        padded_window_size: FFT 长度
+        sample_freq: 采样率
+        low_freq: 最低频率
+
+    Returns:
+        Tensor: [num_bins, padded_window_size // 2 + 1]，最后一列（奈奎斯特频率）为 0
+    """
+
+    def mel_scale(freq):
+        return 1127.0 * torch.log(1.0 + freq / 700.0)
+
+    num_fft_bins = padded_window_size // 2
+    fft_bin_width = sample_freq / padded_window_size
+    mel_low = 1127.0 * math.log(1.0 + low_freq / 700.0)
+    mel_high = 1127.0 * math.log(1.0 + 0.5 * sample_freq / 700.0)
+    mel_delta = (mel_high - mel_low) / (num_bins + 1)
+
+    bin = torch.arange(num_bins).unsqueeze(1)
+    left_mel = mel_low + bin * mel_delta
+    center_mel = mel_low + (bin + 1.0) * mel_delta
+    right_mel = mel_low + (bin + 2.0) * mel_delta
+    mel = mel_scale(fft_bin_width * torch.arange(num_fft_bins)).unsqueeze(0)
+    up_slope = (mel - left_mel) / (center_mel - left_mel)
+    down_slope = (right_mel - mel) / (right_mel - center_mel)
+    bins = torch.clamp(torch.min(up_slope, down_slope), min=0.0)
+    return F.pad(bins, (0, 1))
+
+
+def feature_window(window_type: str, window_size: int) -> torch.Tensor:
+    """kaldi 分帧窗函数"""
+    if window_type == "hanning":
+        return torch.hann_window(window_size, periodic=False)
+    if window_type == "hamming":
+        return torch.hamming_window(window_size, periodic=False, alpha=0.54, beta=0.46)
+    if window_type == "povey":
+        return torch.hann_window(window_size, periodic=False).pow(0.85)
+    if window_type == "rectangular":
+        return torch.ones(window_size)
+    if window_type == "blackman":
+        a = 2 * math.pi / (window_size - 1)
+        n = torch.arange(window_size, dtype=torch.float32)
+        return 0.42 - 0.5 * torch.cos(a * n) + 0.08 * torch.cos(2 * a * n)
+    raise ValueError(f"不支持的窗函数: {window_type}")
+
+
+class BatchFbank:
+    """批量计算 fbank + LFR + CMVN 特征，配置取自 funasr WavFrontend
+
+    Attributes:
+        frontend: 原始前端，短于一帧的音频仍交给它逐条处理
+        window_size: 帧长（采样点）
+        window_shift: 帧移（采样点）
+        padded_window_size: FFT 长度
+    """
+
+    def __init__(self, frontend):
+        """初始化
+
+        Args:
+            frontend: funasr WavFrontend 实例（snip_edges 需为 True）
+        """
+        if not getattr(frontend, "snip_edges", True):
+            raise ValueError("BatchFbank 只支持 snip_edges=True 的前端")
+        self.frontend = frontend
+        self.window_size = int(frontend.fs * frontend.frame_length / 1000)
+        self.window_shift = int(frontend.fs * frontend.frame_shift / 1000)
+        self.padded_window_size = 1 << (self.window_size - 1).bit_length()
+        self.window = feature_window(frontend.window, self.window_size)
+        self.mel_banks = mel_banks(frontend.n_mels, self.padded_window_size, frontend.fs)
+        self._device_tensors = {}
+
+    def _tensors(self, device):
+        """窗函数、滤波器组与 CMVN 参数在各设备上的副本"""
+        if device not in self._device_tensors:
+            cmvn = self.frontend.cmvn
+            self._device_tensors[device] = (
+                self.window.to(device),
+                self.mel_banks.T.repeat_interleave(2, dim=0).to(device),
+                None if cmvn is None else cmvn.to(device),
+            )
+        return self._device_tensors[device]
+
+    def __call__(self, waveforms: list, device=None):
+        """计算一批音频的特征
+
+        Args:
+            waveforms: 采样率为 frontend.fs 的一维音频张量列表
+            device: 计算设备，默认为第一条音频所在设备
+
+        Returns:
+            tuple: (特征 [B, T, n_mels * lfr_m]（右填充 0）, 特征帧数 [B])
+        """
+        device = torch.device(device) if device is not None else waveforms[0].device
+        window, banks, cmvn = self._tensors(device)
+        frontend = self.frontend
+        lengths = torch.tensor([w.shape[-1] for w in waveforms])
+        short = [i for i, length in enumerate(lengths.tolist()) if length < self.window_size]
+        if len(short) == len(waveforms):
+            return self._per_item(waveforms, short, device)
+
+        # 1. 右填充后分帧 [B, M, W]
+        wave = torch.nn.utils.rnn.pad_sequence(
+            [w.reshape(-1).to(device, torch.float32) for w in waveforms], batch_first=True
+        )
+        if frontend.upsacle_samples:
+            wave = wave * (1 << 15)
+        frames = wave.unfold(1, self.window_size, self.window_shift)
+        num_frames = torch.clamp((lengths - self.window_size) // self.window_shift + 1, min=0)
+
+        # 2. 抖动、去直流、预加重、加窗
+        # 帧均值由滑动平均得到，避免在重叠的分帧视图上归约
+        frame_means = F.avg_pool1d(wave[:, None], self.window_size, self.window_shift)[:, 0, :, None]
+        if frontend.dither != 0.0:
+            noise = torch.randn_like(frames).mul_(frontend.dither)
+            frames = frames + noise
+            frame_means = frame_means + noise.mean(dim=-1, keepdim=True)
+        frames = frames - frame_means
+        emphasized = torch.empty_like(frames)
+        torch.mul(frames[..., :1], 1 - 0.97, out=emphasized[..., :1])
+        torch.add(frames[..., 1:], frames[..., :-1], alpha=-0.97, out=emphasized[..., 1:])
+        frames = emphasized.mul_(window)
+
+        # 3. 功率谱与 mel 滤波，取对数（rfft 内部补零到 FFT 长度）
+        # 实部、虚部交错排列，平方后与每行重复两次的滤波器组相乘即得功率谱的 mel 能量
+        spectrum = torch.view_as_real(torch.fft.rfft(frames, n=self.padded_window_size))
+        fbank = torch.matmul(spectrum.square_().flatten(-2), banks)
+        fbank = torch.clamp(fbank, min=torch.finfo(fbank.dtype).eps).log()
+
+        # 4. LFR：第 t 帧拼接原始第 t*lfr_n - (lfr_m-1)//2 起的 lfr_m 帧，越界取首尾帧
+        lfr_m, lfr_n = frontend.lfr_m, frontend.lfr_n
+        if lfr_m != 1 or lfr_n != 1:
+            lfr_frames = (num_frames + lfr_n - 1) // lfr_n
+            t = torch.arange(int(lfr_frames.max()), device=device)
+            index = (t[:, None] * lfr_n + torch.arange(lfr_m, device=device)) - (lfr_m - 1) // 2
+            last = (num_frames.to(device) - 1).clamp(min=0)[:, None, None]
+            index = torch.minimum(index.clamp(min=0)[None], last)  # [B, T', lfr_m]
+            batch_size, _, n_mels = fbank.shape
+            fbank = torch.gather(
+                fbank, 1, index.reshape(batch_size, -1, 1).expand(-1, -1, n_mels)
+            ).reshape(batch_size, index.shape[1], lfr_m * n_mels)
+            num_frames = lfr_frames
+
+        # 5. CMVN，填充帧置 0
+        if cmvn is not None:
+            fbank = (fbank + cmvn[0, : fbank.shape[-1]]) * cmvn[1, : fbank.shape[-1]]
+        mask = torch.arange(fbank.shape[1], device=device)[None, :] < num_frames.to(device)[:, None]
+        fbank = fbank * mask[:, :, None]
+
+        if short:
+            # 短于一帧的音频由原始前端缩短帧长后处理
+            short_fbank, short_lengths = self._per_item(waveforms, short, device)
+            max_len = max(fbank.shape[1], short_fbank.shape[1])
+            fbank = F.pad(fbank, (0, 0, 0, max_len - fbank.shape[1]))
+            for j, i in enumerate(short):
+                fbank[i] = 0
+                fbank[i, : short_lengths[j]] = short_fbank[j, : short_lengths[j]]
+                num_frames[i] = short_lengths[j]
+            fbank = fbank[:, : int(num_frames.max())]
+        return fbank, num_frames.to(torch.int32)
+
+    def _per_item(self, waveforms: list, index: list, device):
+        """用原始前端逐条计算指定音频的特征"""
+        feats = []
+        for i in index:
+            waveform = waveforms[i].reshape(1, -1).float().cpu()
+            feat, _ = self.frontend(waveform, torch.tensor([waveform.shape[1]]))
+            feats.append(feat[0])
+        lengths = torch.tensor([feat.shape[0] for feat in feats])
+        fbank = torch.nn.utils.rnn.pad_sequence(feats, batch_first=True).to(device)
+        return fbank, lengths.to(torch.int32)
@@ -18,7 +18,7 @@
 
 import os
 import logging
-from typing import List, Optional, Union
+from typing import Iterator, List, Optional, Union
 from pathlib import Path
 
 import torch
@@ -33,6 +33,9 @@ SUPPORTED_LANGUAGES = [
     "中文", "英文", "日文",
 ]
 
+# transcribe_files() 查找目录时识别的音频格式
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".m4a", ".ogg", ".opus", ".aac", ".wma")
+
 # 多语言版本支持的语言
 SUPPORTED_LANGUAGES_MLT = [
     "中文", "英文", "粤语", "日文", "韩文", "越南语", "印尼语", "泰语", "马来语",
@@ -63,6 +66,21 @@ class FunASR:
         use_vad: bool = False,
         vad_max_segment_time: int = 30000,
         hub: str = "ms",
+        prefix_cache_mb: int = 0,
+        encoder_cache_mb: int = 0,
+        encoder_cache_dir: Optional[str] = None,
+        load_llm: bool = True,
+        quantize: Optional[str] = None,
+        quantize_modules: tuple = ("llm",),
+        quantize_cache_dir: Optional[str] = None,
+        llm_dtype: Optional[str] = None,
+        backend: str = "torch",
+        onnx_model_path: Optional[str] = None,
+        onnx_threads: Optional[int] = None,
+        static_cache: bool = False,
+        result_cache_path: Optional[str] = None,
+        result_cache_mb: int = 1024,
+        result_cache_days: Optional[float] = None,
     ):
         """初始化 Fun-ASR
         
@@ -75,12 +93,77 @@ class FunASR:
             use_vad: 是否启用 VAD（语音活动检测）
             vad_max_segment_time: VAD 最大片段时长（毫秒）
             hub: 模型下载源，"ms" 为 ModelScope，"hf" 为 HuggingFace
+            prefix_cache_mb: 提示词前缀 KV 缓存的内存上限（MB），0 表示不启用；
+                热词列表较长时可显著降低每条语音的预填充耗时
+            encoder_cache_mb: 编码器输出内存缓存上限（MB），0 表示不启用；
+                启用后同一音频换热词、语言或 itn 重新识别时不再重复编码（VAD 模式下不使用）
+            encoder_cache_dir: 编码器输出磁盘缓存目录，指定后同时启用磁盘缓存
+            load_llm: 是否加载 LLM，为 False 时只能使用 mode="ctc"，可节省约一半显存与加载时间
+            quantize: 量化方式，"int8" 为 Linear 层 int8 动态量化（仅 CPU），None 表示不量化
+            quantize_modules: 要量化的子模块，可选 "llm"、"audio_adaptor"、"ctc_decoder"
+            quantize_cache_dir: 量化结果的磁盘缓存目录，默认为 model_dir/quantized
+            llm_dtype: LLM 精度配置，加载时确定，推理时不再转换权重:
+                - "fp32": fp32 权重与计算
+                - "fp16" / "bf16": 半精度权重与计算（GPU）
+                - "bf16_autocast": fp32 权重，autocast 下以 bf16 计算（CPU）
+                None 表示使用模型配置中的 llm_dtype
+            backend: 音频编码器后端，"torch"（默认）或 "onnxruntime"；
+                onnxruntime 在 CPU 上运行编码器与 adaptor，长音频可显著降低延迟。
+                encode()、transcribe()、transcribe_file()、transcribe_files()、transcribe_iter()、
+                transcribe_long() 与流式识别（transcribe_stream()、create_session()，只运行编码器）
+                均使用该后端；use_vad=True 时 transcribe() 与 transcribe_file() 仍使用 PyTorch 编码器
+            onnx_model_path: export.py 导出的 ONNX 编码器，不存在时自动导出，
+                默认为 model_dir/onnx 下按模型版本命名的文件
+            onnx_threads: ONNX Runtime 算子内并行线程数，默认为 CPU 核数
+            static_cache: LLM 生成时使用预分配的静态 KV 缓存，并用 torch.compile 编译
+                逐 token 解码步；同形状请求复用编译结果，首次遇到新形状时编译较慢
+            result_cache_path: 识别结果缓存（SQLite 文件）路径，None 表示不启用；
+                按音频内容、模型版本与解码参数查找，命中时不经过模型直接返回
+            result_cache_mb: 识别结果缓存的大小上限（MB）
+            result_cache_days: 识别结果的保存天数，None 表示不过期
         """
         self.model_name = model_name
         self.model_dir = model_dir
         self.use_vad = use_vad
         self.vad_max_segment_time = vad_max_segment_time
         self.hub = hub
+        self.load_llm = load_llm
+        if quantize not in (None, "int8"):
+            raise ValueError(f"不支持的量化方式: {quantize}，可选: None, \"int8\"")
+        if quantize is not None and llm_dtype not in (None, "fp32"):
+            raise ValueError(f"int8 量化模型只支持 fp32 计算，当前 llm_dtype: {llm_dtype}")
+        if backend not in ("torch", "onnxruntime"):
+            raise ValueError(f"不支持的后端: {backend}，可选: \"torch\", \"onnxruntime\"")
+        self.backend = backend
+        self.onnx_model_path = onnx_model_path
+        self.onnx_threads = onnx_threads
+        self.static_cache = static_cache
+        self.quantize = quantize
+        self.llm_dtype = llm_dtype
+        self.quantize_modules = tuple(quantize_modules)
+        self.quantize_cache_dir = quantize_cache_dir or os.path.join(model_dir, "quantized")
+        self.prefix_cache = None
+        if prefix_cache_mb > 0:
+            from .prefix_cache import PrefixKVCache
+            
+            self.prefix_cache = PrefixKVCache(max_bytes=prefix_cache_mb * 1024 * 1024)
+        self.encoder_cache = None
+        if encoder_cache_mb > 0 or encoder_cache_dir is not None:
+            from .encoder_cache import EncoderCache
+            
+            self.encoder_cache = EncoderCache(
+                max_bytes=encoder_cache_mb * 1024 * 1024,
+                cache_dir=encoder_cache_dir,
+            )
+        self.result_cache = None
+        if result_cache_path is not None:
+            from .result_cache import ResultCache
+            
+            self.result_cache = ResultCache(
+                result_cache_path,
+                max_bytes=result_cache_mb * 1024 * 1024,
+                max_age=None if result_cache_days is None else result_cache_days * 86400,
+            )
         
         # 自动选择设备
         if device is None:
@@ -92,6 +175,8 @@ class FunASR:
                 self.device = "cpu"
         else:
             self.device = device
+        if quantize is not None and torch.device(self.device).type != "cpu":
+            raise ValueError(f"int8 动态量化只支持 CPU 推理，当前设备: {self.device}")
             
         # 设置模型缓存目录
         self._setup_model_dir()
@@ -100,6 +185,9 @@ class FunASR:
         self.model = None
         self.model_direct = None
         self.kwargs = None
+        self._vad = None
+        self._ort_encoder = None
+        self._revision = None
         self._load_model()
         
     def _setup_model_dir(self):
@@ -134,6 +222,7 @@ class FunASR:
                 remote_code=model_py_path,
                 device=self.device,
                 hub=self.hub,
+                load_llm=self.load_llm,
             )
         else:
             self.model = AutoModel(
@@ -142,17 +231,70 @@ class FunASR:
                 remote_code=model_py_path,
                 device=self.device,
                 hub=self.hub,
+                load_llm=self.load_llm,
             )
             
+        if self.llm_dtype is not None:
+            self.model.model.set_llm_precision(self.llm_dtype)
+            
+        if self.quantize == "int8":
+            from .quantize import quantize_int8
+            
+            quantize_int8(
+                self.model.model,
+                modules=self.quantize_modules,
+                cache_dir=self.quantize_cache_dir,
+                cache_key=self._model_revision(),
+            )
+            
+        if self.prefix_cache is not None:
+            self.model.kwargs["prefix_cache"] = self.prefix_cache
+        if self.static_cache:
+            self.model.kwargs["static_cache"] = True
+            
+        if self.backend == "onnxruntime":
+            self._load_ort_encoder()
+            if self.use_vad:
+                logging.warning(
+                    "use_vad=True 时 transcribe() / transcribe_file() 经 VAD 分段后由 PyTorch 编码器识别，"
+                    "onnxruntime 后端只用于 encode()、transcribe_files()、transcribe_long()、"
+                    "transcribe_iter() 与流式识别"
+                )
+            
         logging.info("模型加载完成")
         
+    def _load_ort_encoder(self):
+        """加载 ONNX Runtime 音频编码器，ONNX 文件不存在时先导出"""
+        import hashlib
+        
+        from .ort_backend import OnnxAudioEncoder
+        
+        path = self.onnx_model_path
+        if path is None:
+            digest = hashlib.sha1(self._model_revision().encode("utf-8")).hexdigest()[:16]
+            path = os.path.join(self.model_dir, "onnx", f"encoder-{digest}.onnx")
+        if not os.path.exists(path):
+            from .export import export_audio_encoder
+            
+            model, _ = self._load_direct_model()
+            # CTC 解码器以编码器输出为输入，仍由 PyTorch 运行
+            export_audio_encoder(model, path, with_adaptor=True, with_ctc=False)
+        self._ort_encoder = OnnxAudioEncoder(path, num_threads=self.onnx_threads)
+        
     def transcribe(
         self,
-        audio: Union[str, np.ndarray, torch.Tensor, List[str]],
+        audio: Union[str, np.ndarray, torch.Tensor, bytes, List],
         language: str = "中文",
         hotwords: Optional[List[str]] = None,
         itn: bool = True,
         batch_size: int = 1,
+        mode: str = "llm",
+        speculative: bool = False,
+        cascade_threshold: Optional[float] = None,
+        silence_gate: bool = False,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        packing: bool = False,
     ) -> Union[str, List[str]]:
         """语音转文字
         
@@ -160,14 +302,29 @@ class FunASR:
             audio: 音频输入，支持:
                 - 文件路径 (str)
                 - 文件路径列表 (List[str])
-                - numpy 数组
-                - torch 张量
+                - numpy 数组 / torch 张量（整数类型按满量程归一化）
+                - 16-bit 小端 PCM 字节串 (bytes)
+                - encode() 返回的编码结果
+                - 以上类型的列表
             language: 目标语言，默认 "中文"
                 - Fun-ASR-Nano: 支持 "中文"、"英文"、"日文"
                 - Fun-ASR-MLT-Nano: 支持 31 种语言
             hotwords: 热词列表，用于提高特定词汇的识别准确率
             itn: 是否进行文本规整（数字、日期等标准化）
             batch_size: 批处理大小
+            mode: 解码方式，"llm" 为 LLM 生成（默认），"ctc" 只用 CTC 分支贪心解码，
+                跳过 LLM 生成，延迟低但不支持热词、itn
+            speculative: 以 CTC 结果为草稿做推测解码，结果与贪心解码一致，
+                长语音上可大幅减少 LLM 解码步数
+            cascade_threshold: CTC 置信度阈值（0~1），置信度不低于阈值的语音直接返回
+                CTC 结果、不调用 LLM，None 表示不启用
+            silence_gate: 识别前用能量/过零率检测去掉首尾及中间的静音，
+                静音占比高的音频（如客服录音）可显著减少计算量
+            sample_rate: 内存中音频（数组、张量、PCM 字节串）的采样率，
+                非 16kHz 时在识别前重采样一次
+            channels: PCM 字节串或一维交错数组的声道数
+            packing: 把同一批次的多条短语音打包进一个多轮对话上下文解码，
+                系统提示词每包只计算一次，需配合较大的 batch_size
             
         Returns:
             识别结果文本，如果输入是列表则返回列表
@@ -176,34 +333,640 @@ class FunASR:
             hotwords = []
             
         # 处理输入
-        if isinstance(audio, str):
-            inputs = [audio]
-            single_input = True
-        elif isinstance(audio, list):
-            inputs = audio
-            single_input = False
-        else:
-            # numpy 或 torch 张量
-            inputs = [audio]
-            single_input = True
+        single_input = not isinstance(audio, list)
+        inputs = [audio] if single_input else audio
+        # 内存中的音频直接转换为 16kHz 单声道张量，不经过 funasr 的通用加载流程
+        inputs = [
+            x if isinstance(x, (str, dict)) else self._load_waveform(x, sample_rate, channels)
+            for x in inputs
+        ]
+            
+        texts = [""] * len(inputs)
+        active = list(range(len(inputs)))
+        keys = [None] * len(inputs)
+        if self.result_cache is not None:
+            # 命中结果缓存的输入不再识别（编码结果不参与缓存）
+            for i, x in enumerate(inputs):
+                if not isinstance(x, dict):
+                    keys[i] = self._result_key(
+                        x,
+                        language=language,
+                        hotwords=hotwords,
+                        itn=itn,
+                        mode=mode,
+                        cascade_threshold=cascade_threshold,
+                        packing=packing,
+                        silence_gate=silence_gate,
+                        vad=self.use_vad,
+                    )
+                    cached = self.result_cache.get(keys[i])
+                    if cached is not None:
+                        texts[i] = cached["text"]
+                        active.remove(i)
+            inputs = [inputs[i] for i in active]
+        if silence_gate:
+            from .tools.utils import gate_silence
+            
+            inputs = [
+                x if isinstance(x, dict) else gate_silence(self._load_waveform(x))[0]
+                for x in inputs
+            ]
+            # 整段静音的输入直接返回空文本
+            keep = [j for j, x in enumerate(inputs) if isinstance(x, dict) or x.numel() > 0]
+            active = [active[j] for j in keep]
+            inputs = [inputs[j] for j in keep]
+        if len(inputs) == 0:
+            return texts[0] if single_input else texts
             
         # 执行识别
-        results = self.model.generate(
-            input=inputs,
-            cache={},
-            batch_size=batch_size,
-            hotwords=hotwords,
-            language=language,
-            itn=itn,
-        )
+        if any(isinstance(x, dict) for x in inputs) or (
+            (self.encoder_cache is not None or self._ort_encoder is not None)
+            and not self.use_vad
+        ):
+            results = self._transcribe_encoded(
+                self.encode(inputs, batch_size=batch_size),
+                batch_size=batch_size,
+                hotwords=hotwords,
+                language=language,
+                itn=itn,
+                mode=mode,
+                speculative=speculative,
+                cascade_threshold=cascade_threshold,
+                packing=packing,
+                timestamps="none",
+                timestamp_format=None,
+            )
+        else:
+            results = self.model.generate(
+                input=inputs,
+                cache={},
+                batch_size=batch_size,
+                hotwords=hotwords,
+                language=language,
+                itn=itn,
+                mode=mode,
+                speculative=speculative,
+                cascade_threshold=cascade_threshold,
+                packing=packing,
+                # 只返回文本，不计算时间戳
+                timestamps="none",
+                # VAD 合并分段结果时需要 dict 形式的时间戳
+                timestamp_format="dict" if self.use_vad else None,
+            )
         
         # 提取文本
-        texts = [r["text"] for r in results]
+        for i, r in zip(active, results):
+            texts[i] = r["text"]
+            if keys[i] is not None:
+                self.result_cache.put(keys[i], {"text": r["text"]})
         
         if single_input:
             return texts[0]
         return texts
     
+    def encode(
+        self,
+        audio: Union[str, np.ndarray, torch.Tensor, bytes, List],
+        batch_size: int = 1,
+        sample_rate: int = 16000,
+        channels: int = 1,
+    ) -> Union[dict, List[dict]]:
+        """只运行音频编码器
+        
+        返回的编码结果可直接传给 transcribe，用不同的热词、语言或 itn 重复识别，
+        此时只需运行 adaptor 与 LLM。启用编码器缓存时按音频内容哈希读写缓存。
+        
+        Args:
+            audio: 音频输入（文件路径、numpy 数组、torch 张量或 PCM 字节串，或它们的列表）
+            batch_size: 编码时的批处理大小
+            sample_rate: 内存中音频的采样率
+            channels: PCM 字节串或一维交错数组的声道数
+            
+        Returns:
+            编码结果 {"encoder_out": Tensor[T, D]}（ONNX Runtime 计算图带有 adaptor 时
+            另含 "adaptor_out"），如果输入是列表则返回列表
+        """
+        from .tools.utils import audio_content_hash
+        
+        single_input = not isinstance(audio, list)
+        inputs = [audio] if single_input else audio
+        inputs = [
+            x if isinstance(x, (str, dict)) else self._load_waveform(x, sample_rate, channels)
+            for x in inputs
+        ]
+        model, kwargs = self._load_direct_model()
+        
+        outputs, cache_keys, todo = [None] * len(inputs), [None] * len(inputs), []
+        for i, item in enumerate(inputs):
+            if isinstance(item, dict):
+                outputs[i] = item
+                continue
+            if self.encoder_cache is not None:
+                cache_keys[i] = (*self._encoder_config(), audio_content_hash(item))
+                encoder_out = self.encoder_cache.get(cache_keys[i])
+                if encoder_out is not None:
+                    outputs[i] = {"encoder_out": encoder_out}
+                    continue
+            todo.append(i)
+            
+        for beg in range(0, len(todo), batch_size):
+            indices = todo[beg : beg + batch_size]
+            waveforms = [self._load_waveform(inputs[i]) for i in indices]
+            if self._ort_encoder is not None:
+                encoded = self._ort_encoder.encode(waveforms, **kwargs)
+            else:
+                with torch.no_grad():
+                    encoded = [
+                        {"encoder_out": encoder_out}
+                        for encoder_out in model.encode_audio(waveforms, **kwargs)
+                    ]
+            for i, item in zip(indices, encoded):
+                if self.encoder_cache is not None:
+                    # 缓存只保存编码器输出，命中时 adaptor 由 PyTorch 运行
+                    item["encoder_out"] = self.encoder_cache.put(cache_keys[i], item["encoder_out"])
+                outputs[i] = item
+                
+        if single_input:
+            return outputs[0]
+        return outputs
+    
+    def transcribe_files(
+        self,
+        files: Union[str, List[str]],
+        language: str = "中文",
+        hotwords: Optional[List[str]] = None,
+        itn: bool = True,
+        batch_size: int = 8,
+        mode: str = "llm",
+        speculative: bool = False,
+        cascade_threshold: Optional[float] = None,
+        packing: bool = False,
+        num_workers: int = 2,
+        prefetch_batches: int = 2,
+    ) -> Iterator[dict]:
+        """批量转写大量音频文件，音频解码与特征提取在后台线程中预取
+        
+        模型处理当前批次时，线程池提前解码后续文件并提取 fbank，最多预取
+        prefetch_batches 个批次（背压），结果按文件顺序逐条产出。不做 VAD 切分，
+        长录音请使用 transcribe_long()。提前结束迭代（break 或关闭生成器）或出错时，
+        取消尚未开始的预取任务并关闭线程池。
+        
+        Args:
+            files: 音频文件路径列表，或目录（递归查找常见音频格式）
+            language: 目标语言
+            hotwords: 热词列表
+            itn: 是否进行文本规整
+            batch_size: 批处理大小
+            mode: 解码方式，"llm" 或 "ctc"
+            speculative: 以 CTC 结果为草稿做推测解码
+            cascade_threshold: CTC 置信度阈值，None 表示不启用级联
+            packing: 把同一批次的短语音打包进一个多轮对话上下文解码
+            num_workers: 预取线程数
+            prefetch_batches: 最多预取的批次数
+            
+        Yields:
+            dict: {"file": 文件路径, "text": 识别文本}
+            
+        Example:
+            >>> for result in asr.transcribe_files("recordings/", batch_size=16):
+            ...     print(result["file"], result["text"])
+        """
+        from .prefetch import Prefetcher, extract_features
+        
+        if isinstance(files, (str, Path)) and os.path.isdir(files):
+            files = sorted(
+                str(path) for path in Path(files).rglob("*")
+                if path.suffix.lower() in AUDIO_EXTENSIONS
+            )
+        elif isinstance(files, (str, Path)):
+            files = [str(files)]
+        files = list(files)
+        
+        # 命中结果缓存的文件不再识别，与其他文件一起按顺序产出
+        done, keys = {}, [None] * len(files)
+        if self.result_cache is not None:
+            for i, path in enumerate(files):
+                # 逐文件整段识别，不去静音也不经过 VAD
+                keys[i] = self._result_key(
+                    path,
+                    language=language,
+                    hotwords=hotwords,
+                    itn=itn,
+                    mode=mode,
+                    cascade_threshold=cascade_threshold,
+                    packing=packing,
+                )
+                cached = self.result_cache.get(keys[i])
+                if cached is not None:
+                    done[i] = cached["text"]
+        todo = [i for i in range(len(files)) if i not in done]
+        next_index = 0
+        
+        model, kwargs = self._load_direct_model()
+        infer_kwargs = {
+            **kwargs,
+            "hotwords": hotwords or [],
+            "language": language,
+            "itn": itn,
+            "mode": mode,
+            "speculative": speculative,
+            "cascade_threshold": cascade_threshold,
+            "packing": packing,
+            "timestamps": "none",
+            "timestamp_format": None,
+        }
+        prefetcher = Prefetcher(
+            lambda path: extract_features(self._load_waveform(path), kwargs["frontend"]),
+            num_workers=num_workers,
+            max_pending=batch_size * prefetch_batches,
+        )
+        features = prefetcher.map([files[i] for i in todo])
+        # 提前结束迭代或出错时关闭预取生成器，取消未开始的任务并关闭线程池
+        try:
+            for beg in range(0, len(todo), batch_size):
+                while next_index in done:
+                    yield {"file": files[next_index], "text": done.pop(next_index)}
+                    next_index += 1
+                batch_index = todo[beg : beg + batch_size]
+                batch_files = [files[i] for i in batch_index]
+                batch = [next(features) for _ in batch_files]
+                if self._ort_encoder is not None:
+                    speech = torch.nn.utils.rnn.pad_sequence(
+                        [item["fbank"] for item in batch], batch_first=True
+                    )
+                    speech_lengths = torch.tensor([item["fbank"].shape[0] for item in batch])
+                    batch = self._ort_encoder.encode_fbank(speech, speech_lengths)
+                with torch.no_grad():
+                    res, _ = model.inference(
+                        batch, key=batch_files, **{**infer_kwargs, "batch_size": len(batch)}
+                    )
+                for i, result in zip(batch_index, res):
+                    done[i] = result["text"]
+                    if keys[i] is not None:
+                        self.result_cache.put(keys[i], {"text": result["text"]})
+            while next_index in done:
+                yield {"file": files[next_index], "text": done.pop(next_index)}
+                next_index += 1
+        finally:
+            features.close()
+        logging.info(
+            f"已转写 {len(todo)} 个文件（{len(files) - len(todo)} 个命中结果缓存），"
+            f"等待预取共 {prefetcher.stats['wait']:.2f}s"
+        )
+        
+    def transcribe_iter(
+        self,
+        audio: Union[str, np.ndarray, torch.Tensor, bytes, dict],
+        language: str = "中文",
+        hotwords: Optional[List[str]] = None,
+        itn: bool = True,
+        speculative: bool = False,
+        cascade_threshold: Optional[float] = None,
+        sample_rate: int = 16000,
+        channels: int = 1,
+    ) -> Iterator[str]:
+        """逐 token 流式输出识别文本
+        
+        LLM 在后台线程中生成，每确认一段文本立即产出；中日韩文字逐字输出，
+        其他文字按单词输出，不会产出不完整的 UTF-8 字符。适合对首字延迟敏感的场景。
+        产出的片段已去掉 /sil 并合并空白，拼接后与 transcribe() 的文本一致。
+        级联直接采用 CTC 结果时，文本在识别结束后一次性产出；陷入重复循环而回退到
+        CTC 结果时，已产出的 LLM 文本无法撤回，以 transcribe() 的结果为准。
+        提前结束迭代（break 或关闭生成器）时，后台生成在下一个 token 处停止。
+        
+        Args:
+            audio: 单条音频输入（文件路径、numpy 数组、torch 张量、PCM 字节串或编码结果）
+            language: 目标语言
+            hotwords: 热词列表
+            itn: 是否进行文本规整
+            speculative: 以 CTC 结果为草稿做推测解码
+            cascade_threshold: CTC 置信度阈值，None 表示不启用级联
+            sample_rate: 内存中音频的采样率
+            channels: PCM 字节串或一维交错数组的声道数
+            
+        Yields:
+            str: 新增的文本片段
+            
+        Example:
+            >>> for piece in asr.transcribe_iter("audio.wav"):
+            ...     print(piece, end="", flush=True)
+        """
+        import queue
+        import threading
+        
+        from .token_streamer import StreamStopped, TokenTextStreamer
+        from .tools.utils import normalize_response
+        
+        if not isinstance(audio, dict):
+            audio = self._load_waveform(audio, sample_rate, channels)
+            if self.encoder_cache is not None or self._ort_encoder is not None:
+                audio = self.encode(audio)
+        model, kwargs = self._load_direct_model()
+        pieces = queue.Queue()
+        streamer = TokenTextStreamer(kwargs["tokenizer"], pieces.put, normalize=normalize_response)
+        done = object()
+        
+        def run():
+            try:
+                with torch.no_grad():
+                    res, _ = model.inference(
+                        [audio],
+                        **{
+                            **kwargs,
+                            "hotwords": hotwords or [],
+                            "language": language,
+                            "itn": itn,
+                            "mode": "llm",
+                            "speculative": speculative,
+                            "cascade_threshold": cascade_threshold,
+                            "streamer": streamer,
+                            "packing": False,
+                            "timestamps": "none",
+                            "timestamp_format": None,
+                            "batch_size": 1,
+                        },
+                    )
+                if res[0]["decoder"] != "llm" and not streamer.text:
+                    pieces.put(res[0]["text"])
+            except StreamStopped:
+                pass
+            except Exception as e:
+                pieces.put(e)
+            finally:
+                pieces.put(done)
+                
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while True:
+                piece = pieces.get()
+                if piece is done:
+                    break
+                if isinstance(piece, Exception):
+                    raise piece
+                yield piece
+        finally:
+            # 调用方提前结束迭代时停止生成，等待后台线程退出
+            streamer.stop()
+            thread.join()
+        
+    def transcribe_long(
+        self,
+        audio: Union[str, np.ndarray, torch.Tensor],
+        language: str = "中文",
+        hotwords: Optional[List[str]] = None,
+        itn: bool = True,
+        batch_size: int = 8,
+        max_batch_seconds: float = 300.0,
+        timestamps: str = "llm",
+    ) -> dict:
+        """长音频识别（会议录音等）
+        
+        整段音频只运行一次 VAD，语音片段按时长排序后打包成批，编码器与 LLM 按批并行解码，
+        最后按原始顺序拼接文本，并把各片段的时间戳加上片段起始时间得到全局时间戳。
+        吞吐量取决于批大小而不是片段数。
+        
+        Args:
+            audio: 音频文件路径，或 16kHz numpy 数组 / torch 张量
+            language: 目标语言
+            hotwords: 热词列表
+            itn: 是否进行文本规整
+            batch_size: 每批最多片段数
+            max_batch_seconds: 每批补齐后的最大总时长（秒），限制显存占用
+            timestamps: 计算哪些文本的时间戳，"none"、"ctc"、"llm" 或 "both"
+            
+        Returns:
+            dict: 包含以下字段:
+                - text: 拼接后的识别文本
+                - segments: 每个语音片段的 {"start", "end", "text"}（秒）
+                - timestamps: 全局 token 时间戳（TokenTimestamps，单位秒），需要 dict 时调用 to_list()
+                - duration: 音频时长
+        """
+        from .tools.utils import concat_timestamps
+        
+        if hotwords is None:
+            hotwords = []
+        model, kwargs = self._load_direct_model()
+        sample_rate = 16000
+        waveform = self._load_waveform(audio)
+        
+        # 1. 整段运行一次 VAD，得到毫秒为单位的语音区间
+        vad_model, vad_kwargs = self._load_vad_model()
+        vad_res = self.model.inference(
+            waveform.numpy(), model=vad_model, kwargs=vad_kwargs, disable_pbar=True
+        )
+        vad_segments = vad_res[0]["value"] if vad_res else []
+        spans = []
+        for beg_ms, end_ms in vad_segments:
+            beg = max(0, int(beg_ms * sample_rate / 1000))
+            end = min(waveform.shape[0], int(end_ms * sample_rate / 1000))
+            if end > beg:
+                spans.append((beg, end))
+                
+        # 2. 按时长从长到短打包，每批片段数与补齐后的总时长均有上限
+        order = sorted(range(len(spans)), key=lambda i: spans[i][0] - spans[i][1])
+        batches, batch = [], []
+        max_batch_samples = max_batch_seconds * sample_rate
+        for i in order:
+            longest = spans[batch[0]][1] - spans[batch[0]][0] if batch else spans[i][1] - spans[i][0]
+            if batch and (len(batch) >= batch_size or longest * (len(batch) + 1) > max_batch_samples):
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+            
+        # 3. 按批解码
+        infer_kwargs = {
+            **kwargs,
+            "hotwords": hotwords,
+            "language": language,
+            "itn": itn,
+            "mode": "llm",
+            "timestamps": timestamps,
+            "timestamp_format": None,
+        }
+        segment_results = [None] * len(spans)
+        for batch in batches:
+            segment_inputs = [waveform[spans[i][0] : spans[i][1]] for i in batch]
+            if self._ort_encoder is not None:
+                segment_inputs = self._ort_encoder.encode(segment_inputs, **kwargs)
+            with torch.no_grad():
+                res, _ = model.inference(
+                    segment_inputs,
+                    key=[f"seg_{i}" for i in batch],
+                    **{**infer_kwargs, "batch_size": len(batch)},
+                )
+            for i, result in zip(batch, res):
+                segment_results[i] = result
+                
+        # 4. 按原始顺序拼接文本与全局时间戳
+        segments, texts = [], []
+        for (beg, end), result in zip(spans, segment_results):
+            text = result["text"].strip()
+            segments.append({"start": beg / sample_rate, "end": end / sample_rate, "text": text})
+            if text:
+                texts.append(text)
+        timestamps_key = "ctc_timestamps" if timestamps == "ctc" else "timestamps"
+        aligned = [
+            (result[timestamps_key], beg / sample_rate)
+            for (beg, _), result in zip(spans, segment_results)
+            if timestamps_key in result
+        ]
+        return {
+            "text": " ".join(texts),
+            "segments": segments,
+            "timestamps": concat_timestamps([t for t, _ in aligned], [o for _, o in aligned]),
+            "duration": waveform.shape[0] / sample_rate,
+        }
+        
+    def _load_vad_model(self):
+        """获取 VAD 模型及其参数，未启用 use_vad 时单独加载 fsmn-vad"""
+        if getattr(self.model, "vad_model", None) is not None:
+            return self.model.vad_model, self.model.vad_kwargs
+        if self._vad is None:
+            from funasr import AutoModel
+            
+            vad = AutoModel(
+                model="fsmn-vad",
+                max_single_segment_time=self.vad_max_segment_time,
+                device=self.device,
+                hub=self.hub,
+                disable_update=True,
+            )
+            self._vad = (vad.model, vad.kwargs)
+        return self._vad
+        
+    def _transcribe_encoded(self, encoded: List[dict], batch_size: int = 1, **cfg) -> List[dict]:
+        """基于编码结果识别，跳过音频编码器"""
+        model, kwargs = self._load_direct_model()
+        results = []
+        for beg in range(0, len(encoded), batch_size):
+            with torch.no_grad():
+                res, _ = model.inference(
+                    encoded[beg : beg + batch_size],
+                    **{**kwargs, **cfg, "batch_size": batch_size},
+                )
+            results.extend(res)
+        return results
+        
+    def _load_waveform(self, audio, sample_rate: int = 16000, channels: int = 1) -> torch.Tensor:
+        """加载为 16kHz 单声道一维张量
+        
+        内存中的音频不经过磁盘：连续的 float32 numpy 数组 / 张量直接共享内存，
+        整数 PCM 只做一次归一化拷贝，采样率不是 16kHz 时只重采样一次。
+        
+        Args:
+            audio: 文件路径、numpy 数组、torch 张量，或 16-bit 小端 PCM 字节串
+            sample_rate: 内存中音频的采样率（文件按文件头读取）
+            channels: PCM 字节串或一维交错数组的声道数
+        """
+        from .tools.utils import get_resampler, load_audio, pcm_to_tensor
+        
+        if isinstance(audio, str):
+            audio, _ = load_audio(audio, 16000)
+            if audio.ndim > 1:
+                # 多声道取平均，声道维为较短的一维
+                audio = audio.mean(dim=0 if audio.shape[0] < audio.shape[1] else 1)
+            return audio.float()
+        if not isinstance(audio, (bytes, bytearray, memoryview)) and audio.ndim > 1:
+            # 多声道：声道维为较短的一维，转为 [frames, channels] 后按交错数据处理
+            if audio.shape[0] < audio.shape[1]:
+                audio = audio.T
+            channels = audio.shape[1]
+        audio = pcm_to_tensor(audio, channels=channels)
+        if sample_rate != 16000:
+            audio = get_resampler(sample_rate, 16000)(audio.cpu())
+        return audio
+        
+    def _model_revision(self) -> str:
+        """模型版本标识，用于区分不同模型权重的缓存
+        
+        由实际加载的模型目录、配置与权重文件的路径、大小和修改时间共同决定，
+        权重更新或换用本地 checkpoint 后标识随之改变。
+        编码器磁盘缓存、量化缓存、ONNX 文件名与识别结果缓存都以它区分模型。
+        """
+        if self._revision is None:
+            import hashlib
+            
+            _, kwargs = self._load_direct_model()
+            model_path = kwargs.get("model_path", None) or self.model_name
+            files = [kwargs.get("init_param", None) or os.path.join(model_path, "model.pt")]
+            files.append(kwargs.get("config", None) or os.path.join(model_path, "config.yaml"))
+            fingerprint = [os.path.abspath(model_path)]
+            for path in files:
+                if not isinstance(path, str) or not os.path.exists(path):
+                    continue
+                stat = os.stat(path)
+                fingerprint.append(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}")
+            digest = hashlib.sha1("|".join(fingerprint).encode("utf-8")).hexdigest()[:16]
+            self._revision = f"{self.model_name}@{digest}"
+        return self._revision
+        
+    def _encoder_config(self) -> tuple:
+        """影响编码器输出的模型配置：模型版本、后端、编码器精度与量化设置
+        
+        用作编码器缓存键的前缀，不同配置的会话共用缓存目录时互不命中。
+        """
+        model, _ = self._load_direct_model()
+        encoder_dtype = next(model.audio_encoder.parameters()).dtype
+        return (
+            self._model_revision(),
+            self.backend,
+            str(encoder_dtype),
+            self.quantize,
+            tuple(sorted(self.quantize_modules)) if self.quantize else None,
+        )
+        
+    def _result_key(
+        self,
+        audio,
+        *,
+        language: str,
+        hotwords: Optional[List[str]],
+        itn: bool,
+        mode: str,
+        cascade_threshold: Optional[float],
+        packing: bool,
+        silence_gate: bool = False,
+        vad: bool = False,
+        timestamps: Optional[str] = None,
+    ) -> str:
+        """识别结果缓存的键：音频内容哈希 + 模型版本与配置 + 规整后的解码参数
+        
+        所有入口都通过这里生成键，得到相同文本的调用生成相同的键；
+        对结果没有影响的参数（如 mode="ctc" 时的级联阈值与打包）不参与计算。
+        
+        Args:
+            audio: 文件路径或音频张量，按内容计算哈希
+            language / hotwords / itn / mode / cascade_threshold / packing: 解码参数
+            silence_gate: 该入口识别前是否去掉静音
+            vad: 该入口识别前是否经过 VAD 分段（此时 VAD 参数同样参与计算）
+            timestamps: 缓存详细结果时的时间戳选项，None 表示只缓存文本
+        """
+        from .result_cache import make_key
+        from .tools.utils import audio_content_hash
+        
+        model, _ = self._load_direct_model()
+        llm = mode == "llm"
+        options = {
+            "language": language,
+            "hotwords": list(hotwords or []),
+            "itn": bool(itn),
+            "mode": mode,
+            "cascade_threshold": cascade_threshold if llm else None,
+            "packing": bool(packing) and llm,
+            "silence_gate": bool(silence_gate),
+            "vad": {"max_segment_time": self.vad_max_segment_time} if vad else None,
+            "timestamps": timestamps,
+            # 影响数值结果的模型配置
+            "llm_dtype": getattr(model, "llm_dtype", self.llm_dtype),
+            "quantize": self.quantize,
+            "quantize_modules": sorted(self.quantize_modules) if self.quantize else None,
+            "backend": self.backend,
+        }
+        return make_key(audio_content_hash(audio), self._model_revision(), **options)
+        
     def transcribe_stream(
         self,
         audio_path: str,
@@ -211,10 +974,12 @@ class FunASR:
         language: str = "中文",
         hotwords: Optional[List[str]] = None,
         itn: bool = True,
+        silence_gate: bool = False,
     ):
         """流式语音识别
         
-        对长音频进行分块流式识别，适用于实时转写场景。
+        对长音频进行分块流式识别，适用于实时转写场景。每次只读取并编码新的音频块，
+        已确认的文本不再重新解码，单块耗时不随音频时长增长。
         
         Args:
             audio_path: 音频文件路径
@@ -222,52 +987,109 @@ class FunASR:
             language: 目标语言
             hotwords: 热词列表
             itn: 是否进行文本规整
+            silence_gate: 跳过连续的静音块，不送入模型
             
         Yields:
             每个音频块的识别结果
         """
-        from .model import FunASRNano
-        from .tools.utils import load_audio
+        from .streaming import StreamingSession
+        from .tools.utils import StreamingResampler, detect_speech
         
-        if hotwords is None:
-            hotwords = []
-            
-        # 加载直接推理模型（如果尚未加载）
-        if self.model_direct is None:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            self.model_direct, self.kwargs = FunASRNano.from_pretrained(
-                model=self.model_name,
-                device=self.device,
-            )
-            self.model_direct.eval()
-            
-        tokenizer = self.kwargs.get("tokenizer", None)
+        model, kwargs = self._load_direct_model()
+        session = StreamingSession(
+            model,
+            kwargs,
+            language=language,
+            hotwords=hotwords,
+            itn=itn,
+            chunk_size=chunk_size,
+            encoder=self._ort_encoder,
+        )
+        silent_blocks = 1  # 开头的静音块同样跳过
+        
+        with sf.SoundFile(audio_path) as f:
+            resampler = None
+            if f.samplerate != session.sample_rate:
+                resampler = StreamingResampler(f.samplerate, session.sample_rate)
+            blocksize = max(1, int(round(chunk_size * f.samplerate)))
+            remaining = f.frames
+            for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+                remaining -= block.shape[0]
+                audio = torch.from_numpy(block).mean(dim=1)
+                if resampler is not None:
+                    # 在块之间保留滤波器状态，块边界处没有失真
+                    audio = resampler(audio, is_final=remaining <= 0)
+                if silence_gate:
+                    silent = detect_speech(audio, session.sample_rate).shape[0] == 0
+                    silent_blocks = silent_blocks + 1 if silent else 0
+                    # 语音后的第一个静音块照常送入，之后的静音块跳过
+                    if silent_blocks > 1:
+                        if remaining > 0:
+                            continue
+                        audio = audio[:0]
+                text = session.accept_waveform(audio, is_final=remaining <= 0)
+                if text:
+                    yield text
+                    
+    def create_session(
+        self,
+        language: str = "中文",
+        hotwords: Optional[List[str]] = None,
+        itn: bool = True,
+        chunk_size: float = 0.72,
+        sample_rate: int = 16000,
+        channels: int = 1,
+        mode: str = "llm",
+    ):
+        """创建推送式实时识别会话
         
-        # 获取音频时长
-        duration = sf.info(audio_path).duration
-        cum_durations = np.arange(chunk_size, duration + chunk_size, chunk_size)
+        适用于麦克风、电话、网络等实时音频源，无需写入临时文件。
         
-        prev_text = ""
-        for idx, cum_duration in enumerate(cum_durations):
-            audio, rate = load_audio(audio_path, 16000, duration=round(cum_duration, 3))
-            
-            result = self.model_direct.inference(
-                [torch.tensor(audio)],
-                prev_text=prev_text,
-                hotwords=hotwords,
-                language=language,
-                itn=itn,
-                **self.kwargs,
-            )
+        Args:
+            language: 目标语言
+            hotwords: 热词列表
+            itn: 是否进行文本规整
+            chunk_size: 每次处理的音频块大小（秒）
+            sample_rate: 输入音频采样率
+            channels: 输入音频声道数
+            mode: 解码方式，"ctc" 适合对延迟敏感的实时字幕
             
-            prev_text = result[0][0]["text"]
+        Returns:
+            StreamingSession: 通过 feed() 推送 PCM 数据获得中间结果，flush() 获得最终结果
             
-            # 处理中间结果
-            if idx != len(cum_durations) - 1:
-                prev_text = tokenizer.decode(tokenizer.encode(prev_text)[:-5]).replace("", "")
-                
-            if prev_text:
-                yield prev_text
+        示例:
+            >>> session = asr.create_session(sample_rate=8000)
+            >>> for pcm in source:
+            ...     result = session.feed(pcm)
+            ...     if result:
+            ...         print(result["text"], result["latency"])
+            >>> print(session.flush()["text"])
+        """
+        from .streaming import StreamingSession
+        
+        model, kwargs = self._load_direct_model()
+        return StreamingSession(
+            model,
+            kwargs,
+            language=language,
+            hotwords=hotwords,
+            itn=itn,
+            chunk_size=chunk_size,
+            input_rate=sample_rate,
+            channels=channels,
+            mode=mode,
+            encoder=self._ort_encoder,
+        )
+        
+    def _load_direct_model(self):
+        """获取可直接调用的 FunASRNano 模型及其推理参数
+        
+        复用 AutoModel 已加载的模型，避免重复加载权重。
+        """
+        if self.model_direct is None:
+            self.model_direct, self.kwargs = self.model.model, self.model.kwargs
+            self.model_direct.eval()
+        return self.model_direct, self.kwargs
                 
     def transcribe_file(
         self,
@@ -275,6 +1097,11 @@ class FunASR:
         language: str = "中文",
         hotwords: Optional[List[str]] = None,
         itn: bool = True,
+        mode: str = "llm",
+        speculative: bool = False,
+        cascade_threshold: Optional[float] = None,
+        timestamps: str = "both",
+        silence_gate: bool = False,
     ) -> dict:
         """转写音频文件（返回详细结果）
         
@@ -283,32 +1110,95 @@ class FunASR:
             language: 目标语言
             hotwords: 热词列表
             itn: 是否进行文本规整
+            mode: 解码方式，"llm"（默认）或 "ctc"
+            speculative: 是否以 CTC 结果为草稿做推测解码
+            cascade_threshold: CTC 置信度阈值，达到阈值时跳过 LLM，None 表示不启用
+            timestamps: 计算哪些文本的时间戳，"none"、"ctc"、"llm" 或 "both"
+            silence_gate: 识别前去掉静音，时间戳仍对应原始音频时间
             
         Returns:
             dict: 包含以下字段:
                 - text: 识别文本
+                - timestamps: LLM 文本每个 token 的时间戳，[{"token", "start_time", "end_time", "score"}, ...]
+                - ctc_timestamps: CTC 文本每个 token 的时间戳
+                - speculative: 推测解码的统计信息（草稿 token 数、接受数、解码步数）
+                - decoder: 给出结果的解码器，"llm" 或 "ctc"
+                - confidence: CTC 置信度（启用 cascade_threshold 时）
                 - text_tn: 规整后的文本
                 - duration: 音频时长
+                - speech_duration: 去掉静音后的时长（启用 silence_gate 时）
         """
         if hotwords is None:
             hotwords = []
             
+        key = None
+        if self.result_cache is not None:
+            key = self._result_key(
+                audio_path,
+                language=language,
+                hotwords=hotwords,
+                itn=itn,
+                mode=mode,
+                cascade_threshold=cascade_threshold,
+                packing=False,
+                silence_gate=silence_gate,
+                vad=self.use_vad,
+                # 详细结果与只含文本的结果分开缓存
+                timestamps=timestamps or "none",
+            )
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                return cached
+            
         # 获取音频信息
         info = sf.info(audio_path)
         
+        audio, spans = audio_path, None
+        if silence_gate:
+            from .tools.utils import gate_silence
+            
+            audio, spans = gate_silence(self._load_waveform(audio_path))
+            if audio.numel() == 0:
+                return {
+                    "key": os.path.basename(audio_path),
+                    "text": "",
+                    "duration": info.duration,
+                    "sample_rate": info.samplerate,
+                    "speech_duration": 0.0,
+                }
+        
         # 执行识别
-        results = self.model.generate(
-            input=[audio_path],
-            cache={},
-            batch_size=1,
+        decode_kwargs = dict(
             hotwords=hotwords,
             language=language,
             itn=itn,
+            mode=mode,
+            speculative=speculative,
+            cascade_threshold=cascade_threshold,
+            packing=False,
+            timestamps=timestamps,
+            timestamp_format="dict",
         )
+        if (self.encoder_cache is not None or self._ort_encoder is not None) and not self.use_vad:
+            results = self._transcribe_encoded(
+                [self.encode(audio)], key=[Path(audio_path).stem], **decode_kwargs
+            )
+        else:
+            results = self.model.generate(input=[audio], cache={}, batch_size=1, **decode_kwargs)
         
         result = results[0]
         result["duration"] = info.duration
         result["sample_rate"] = info.samplerate
+        if spans is not None:
+            from .tools.utils import remap_timestamps
+            
+            # 时间戳映射回原始音频时间
+            for name in ("timestamps", "ctc_timestamps"):
+                if name in result:
+                    result[name] = remap_timestamps(result[name], spans)
+            result["speech_duration"] = audio.numel() / 16000
+        if key is not None:
+            self.result_cache.put(key, result)
         
         return result
     
@@ -12,6 +12,7 @@ import time
 import traceback
 from typing import Union
 
+import numpy as np
 import torch
 import torch.nn as nn
 
@@ -31,10 +32,22 @@ if _current_dir not in sys.path:
     sys.path.insert(0, _current_dir)
 
 from ctc import CTC
-from tools.utils import forced_align
+from frontend import BatchFbank
+from speculative import draft_generate, eos_token_ids, summarize_stats
+from stopping import EarlyStopping, has_repetition, repetition_window, token_budget
+from tools.utils import forced_align_batch, normalize_response, splice_speech_embeds
 
 dtype_map = {"bf16": torch.bfloat16, "fp16": torch.float16, "fp32": torch.float32}
 
+# LLM 精度配置: (权重精度, 计算精度)。权重只在加载时转换一次，推理时不再改变；
+# "bf16_autocast" 保持 fp32 权重、在 autocast 下以 bf16 计算，适合 CPU 推理
+precision_profiles = {
+    "fp32": ("fp32", "fp32"),
+    "fp16": ("fp16", "fp16"),
+    "bf16": ("bf16", "bf16"),
+    "bf16_autocast": ("fp32", "bf16"),
+}
+
 
 @tables.register("model_classes", "FunASRNano")
 class FunASRNano(nn.Module):
@@ -93,19 +106,27 @@ class FunASRNano(nn.Module):
 
         llm_load_kwargs = llm_conf.get("load_kwargs", {})
         config = AutoConfig.from_pretrained(init_param_path)
-        model = AutoModelForCausalLM.from_config(config, **llm_load_kwargs)
+        self.llm_dtype = llm_conf.get("llm_dtype", "fp32")
+        if self.llm_dtype not in precision_profiles:
+            raise ValueError(
+                f"不支持的 llm_dtype: {self.llm_dtype}，可选: {list(precision_profiles)}"
+            )
+        if kwargs.get("load_llm", True):
+            model = AutoModelForCausalLM.from_config(config, **llm_load_kwargs)
 
-        freeze = llm_conf.get("freeze", True)
-        if freeze:
-            for _, param in model.named_parameters():
-                param.requires_grad = False
-            model.eval()
-        if llm_conf.get("activation_checkpoint", False):
-            model.gradient_checkpointing_enable()
+            freeze = llm_conf.get("freeze", True)
+            if freeze:
+                for _, param in model.named_parameters():
+                    param.requires_grad = False
+                model.eval()
+            if llm_conf.get("activation_checkpoint", False):
+                model.gradient_checkpointing_enable()
 
-        self.llm_dtype = llm_conf.get("llm_dtype", "fp32")
-        self.llm = model.to(dtype_map[self.llm_dtype])
-        llm_dim = model.get_input_embeddings().weight.shape[-1]
+            self.llm = model.to(dtype_map[precision_profiles[self.llm_dtype][0]])
+            llm_dim = model.get_input_embeddings().weight.shape[-1]
+        else:
+            # 仅 CTC 模式：不构建 LLM，checkpoint 中的 LLM 权重也不会加载到模型中
+            llm_dim = config.hidden_size
 
         # adaptor
         adaptor_class = tables.adaptor_classes.get(audio_adaptor)
@@ -172,6 +193,11 @@ class FunASRNano(nn.Module):
             self.error_calculator = None
 
         self.length_normalized_loss = length_normalized_loss
+        # 静态 KV 缓存池与解码步编译配置，见 acquire_static_cache()
+        self.static_caches = {}
+        self.compile_config = None
+        # 批量 fbank 前端，见 fbank_batch()
+        self.batch_fbank = None
         rank = int(os.environ.get("RANK", 0))
         logging.info(f"rank: {rank}, model is builded.")
 
@@ -213,34 +239,9 @@ class FunASRNano(nn.Module):
             fake_token_len[fake_token_len < 0] = 0
             fbank_beg[fbank_beg < 0] = 0
 
-            speech_idx = 0
-            for batch_idx in range(batch_size):
-                for turn_id in range(fbank_beg.shape[1]):
-                    fbank_beg_idx = fbank_beg[batch_idx, turn_id].item()
-                    if fbank_beg_idx > 0:
-                        speech_token_len = fake_token_len[batch_idx, turn_id]
-                        speech_token = encoder_out[speech_idx, :speech_token_len, :]
-
-                        try:
-                            inputs_embeds[
-                                batch_idx,
-                                fbank_beg_idx : fbank_beg_idx + speech_token_len,
-                                :,
-                            ] = speech_token
-                        except Exception as e:
-                            logging.error(f"{str(e)}, {traceback.format_exc()}")
-                            logging.info(
-                                f"batch_idx: {batch_idx}, inputs_embeds: {inputs_embeds.shape}, fbank_beg_idx: {fbank_beg_idx}, speech_token_len: {speech_token_len}, encoder_out: {encoder_out.shape}, encoder_out_lens: {encoder_out_lens}, fake_token_len: {fake_token_len}, speech_lengths: {speech_lengths}"
-                            )
-                            speech_token_len = encoder_out_lens[speech_idx].item()
-                            speech_token = encoder_out[speech_idx, :speech_token_len, :]
-                            inputs_embeds[
-                                batch_idx,
-                                fbank_beg_idx : fbank_beg_idx + speech_token_len,
-                                :,
-                            ] = speech_token
-
-                        speech_idx += 1
+            splice_speech_embeds(
+                inputs_embeds, encoder_out, encoder_out_lens, fbank_beg, fake_token_len
+            )
 
             stats["batch_size_speech"] = batch_size_speech
             stats["batch_size_x_frames"] = frames * batch_size_speech
@@ -250,13 +251,13 @@ class FunASRNano(nn.Module):
         device_type = next(self.parameters()).device.type
         with torch.autocast(
             device_type=device_type if device_type in ["cuda", "xpu", "mps"] else "cpu",
-            enabled=True if self.llm_dtype != "fp32" else False,
-            dtype=dtype_map[self.llm_dtype],
+            enabled=True if precision_profiles[self.llm_dtype][1] != "fp32" else False,
+            dtype=dtype_map[precision_profiles[self.llm_dtype][1]],
         ):
             labels_ids[labels_ids == -1] = -100
             attention_mask[attention_mask < 0] = 0
             model_outputs = self.llm(
-                inputs_embeds=inputs_embeds.to(dtype_map[self.llm_dtype]),
+                inputs_embeds=inputs_embeds.to(dtype_map[precision_profiles[self.llm_dtype][0]]),
                 attention_mask=attention_mask,
                 labels=labels_ids,
             )
@@ -296,6 +297,79 @@ class FunASRNano(nn.Module):
         encoder_out, encoder_out_lens = self.audio_encoder(speech, speech_lengths)
         return encoder_out, encoder_out_lens
 
+    def encode_audio(self, audio_list: list, frontend=None, **kwargs):
+        """提取 fbank 并运行音频编码器
+
+        Args:
+            audio_list: 采样率为 frontend.fs 的一维音频张量列表
+            frontend: 前端处理器
+            **kwargs: 其他参数（device、fp16、bf16）
+
+        Returns:
+            list: 每条音频的编码器输出，形状为 [T, D]
+        """
+        device = kwargs.get("device", "cpu")
+        speech, speech_lengths = self.fbank_batch(audio_list, frontend, device)
+        if kwargs.get("fp16", False):
+            speech = speech.to(torch.float16)
+        elif kwargs.get("bf16", False):
+            speech = speech.to(torch.bfloat16)
+        encoder_out, encoder_out_lens = self.encode(speech, speech_lengths)
+        return [encoder_out[i, : encoder_out_lens[i]] for i in range(encoder_out.shape[0])]
+
+    def fbank_batch(self, audio_list: list, frontend, device=None):
+        """对一批音频一次性计算 fbank + LFR + CMVN 特征
+
+        Args:
+            audio_list: 采样率为 frontend.fs 的一维音频张量列表
+            frontend: 前端处理器
+            device: 计算设备，默认为 CPU
+
+        Returns:
+            tuple: (特征 [B, T, D], 特征帧数 [B])，可直接传给 encode()
+        """
+        if self.batch_fbank is None or self.batch_fbank.frontend is not frontend:
+            self.batch_fbank = BatchFbank(frontend)
+        speech, speech_lengths = self.batch_fbank(audio_list, device=device or "cpu")
+        return speech, speech_lengths.to(speech.device)
+
+    def prepare_fbank_inputs(self, data_in: list, frontend, **kwargs) -> list:
+        """把批次中的音频输入（路径、张量、numpy 数组）替换为批量计算的 fbank 特征
+
+        编码结果等其他输入保持不变。
+
+        Args:
+            data_in: 输入列表
+            frontend: 前端处理器
+
+        Returns:
+            list: 音频输入替换为 {"fbank": Tensor[T, D]} 后的输入列表
+        """
+        index = [i for i, data in enumerate(data_in) if not isinstance(data, dict)]
+        if len(index) < 2:
+            return data_in
+        audio_list = []
+        for i in index:
+            data = data_in[i]
+            if isinstance(data, np.ndarray):
+                data = torch.from_numpy(data)
+            elif isinstance(data, str):
+                data = load_audio_text_image_video(data, fs=frontend.fs, **kwargs)
+            audio_list.append(data)
+        speech, speech_lengths = self.fbank_batch(audio_list, frontend, kwargs.get("device", "cpu"))
+        data_in = list(data_in)
+        for j, i in enumerate(index):
+            data_in[i] = {"fbank": speech[j, : speech_lengths[j]]}
+        return data_in
+
+    def speech_token_len(self, speech_len: int) -> int:
+        """由 fbank 帧数计算送入 LLM 的语音 token 数"""
+        if self.use_low_frame_rate:
+            olens = 1 + (speech_len - 3 + 2 * 1) // 2
+            olens = 1 + (olens - 3 + 2 * 1) // 2
+            return (olens - 1) // 2 + 1
+        return speech_len
+
     def data_template(self, data):
         system, user, assistant = [], [], []
         for i, item in enumerate(data):
@@ -342,6 +416,7 @@ class FunASRNano(nn.Module):
             [],
         )
         input_source_ids = []
+        encoder_slots, adaptor_slots = [], []
         for i, (system_prompt, user_prompt, target_out) in enumerate(zip(system, user, assistant)):
             if i >= kwargs.get("multiturn_num_max", 5):
                 break
@@ -391,25 +466,50 @@ class FunASRNano(nn.Module):
                         sub_str = sub_str[1:]
                     if sub_str.startswith("!"):  # !!: audio sample point
                         sub_str = audio
-                    try:
-                        time1 = time.perf_counter()
-                        data_src = load_audio_text_image_video(
-                            sub_str, fs=frontend.fs, **kwargs
+                    if isinstance(sub_str, dict) and "encoder_out" in sub_str:
+                        # 预先计算好的编码器输出，跳过加载音频与提取特征
+                        encoder_out_i = sub_str["encoder_out"]
+                        meta_data["batch_data_time"] = (
+                            encoder_out_i.shape[0] * frontend.frame_shift * frontend.lfr_n / 1000
                         )
+                        fake_token_len_i = self.speech_token_len(encoder_out_i.shape[0])
+                        fake_token = [0] * fake_token_len_i
+                        fbank_beg_i = len(source_ids)
+                        source_ids += fake_token
+                        fbank_mask_i += [1] * len(fake_token)
+                        encoder_slots.append(encoder_out_i)
+                        adaptor_slots.append(sub_str.get("adaptor_out", None))
+                        continue
+                    if isinstance(sub_str, dict) and "fbank" in sub_str:
+                        # 后台预取的 fbank 特征（见 prefetch.py），跳过加载音频与提取特征
+                        speech = sub_str["fbank"][None, :, :]
+                        speech_lengths = torch.tensor([speech.shape[1]], dtype=torch.int32)
+                    else:
+                        time1 = time.perf_counter()
+                        if isinstance(sub_str, torch.Tensor):
+                            # 内存中的音频（采样率已为 frontend.fs）直接使用，不经过通用加载流程
+                            data_src = sub_str
+                        else:
+                            try:
+                                data_src = load_audio_text_image_video(
+                                    sub_str, fs=frontend.fs, **kwargs
+                                )
+                            except Exception as e:
+                                logging.error(
+                                    f"Loading wav failed! {str(e)}, {traceback.format_exc()}"
+                                )
                         time2 = time.perf_counter()
                         meta_data["load_data"] = f"{time2 - time1:0.3f}"
-                    except Exception as e:
-                        logging.error(f"Loading wav failed! {str(e)}, {traceback.format_exc()}")
-
-                    speech, speech_lengths = extract_fbank(
-                        data_src,
-                        data_type=kwargs.get("data_type", "sound"),
-                        frontend=frontend,
-                        is_final=True,
-                    )  # speech: [b, T, d]
-
-                    time3 = time.perf_counter()
-                    meta_data["extract_feat"] = f"{time3 - time2:0.3f}"
+
+                        speech, speech_lengths = extract_fbank(
+                            data_src,
+                            data_type=kwargs.get("data_type", "sound"),
+                            frontend=frontend,
+                            is_final=True,
+                        )  # speech: [b, T, d]
+
+                        time3 = time.perf_counter()
+                        meta_data["extract_feat"] = f"{time3 - time2:0.3f}"
                     meta_data["batch_data_time"] = (
                         speech_lengths.sum().item()
                         * frontend.frame_shift
@@ -417,12 +517,7 @@ class FunASRNano(nn.Module):
                         / 1000
                     )
 
-                    if self.use_low_frame_rate:
-                        olens = 1 + (speech_lengths[0].item() - 3 + 2 * 1) // 2
-                        olens = 1 + (olens - 3 + 2 * 1) // 2
-                        fake_token_len_i = (olens - 1) // 2 + 1
-                    else:
-                        fake_token_len_i = speech_lengths[0].item()
+                    fake_token_len_i = self.speech_token_len(speech_lengths[0].item())
                     fake_token = [0] * fake_token_len_i
                     fbank_beg_i = len(source_ids)
                     source_ids += fake_token
@@ -440,6 +535,8 @@ class FunASRNano(nn.Module):
             if len(speech) > 0:
                 fbank.append(speech[0, :, :])
                 fbank_lens.append(speech_lengths)
+                encoder_slots.append(None)
+                adaptor_slots.append(None)
 
         input_ids = torch.tensor(input_ids, dtype=torch.int64)
         attention_mask = torch.tensor([1] * len(input_ids), dtype=torch.int32)
@@ -470,96 +567,204 @@ class FunASRNano(nn.Module):
             "labels_ids": labels,
             "source_ids": source_ids[None, :],
             "target_ids": target_ids[None, :],
+            "encoder_slots": encoder_slots,
+            "adaptor_slots": adaptor_slots,
         }
 
         return output
 
-    def inference_prepare(
-        self,
-        data_in,
-        data_lengths=None,
-        key: list = None,
-        tokenizer=None,
-        frontend=None,
-        **kwargs,
-    ):
+    def inference_collate(self, outputs: list):
+        """将多条样本的 data_load_speech 输出拼成一个批次
+
+        文本部分左填充到同一长度（便于 generate 续写），fbank 特征右填充，
+        fbank_beg 随左填充长度整体平移。
+
+        Args:
+            outputs: data_load_speech 的输出列表
+
+        Returns:
+            dict: 批次数据
+        """
+        batch_size = len(outputs)
+        source_lens = [output["source_ids"].shape[1] for output in outputs]
+        max_len = max(source_lens)
+        num_turns = max(output["fbank_beg"].shape[1] for output in outputs)
+
+        source_ids = torch.zeros(batch_size, max_len, dtype=torch.int64)
+        source_mask = torch.zeros(batch_size, max_len, dtype=torch.int32)
+        fbank_beg = torch.zeros(batch_size, num_turns, dtype=torch.int32)
+        fake_token_len = torch.zeros(batch_size, num_turns, dtype=torch.int32)
+        fbank, fbank_lens, encoder_slots, adaptor_slots = [], [], [], []
+        for batch_idx, output in enumerate(outputs):
+            pad_len = max_len - source_lens[batch_idx]
+            source_ids[batch_idx, pad_len:] = output["source_ids"][0]
+            source_mask[batch_idx, pad_len:] = 1
+
+            beg = output["fbank_beg"][0]
+            fbank_beg[batch_idx, : beg.shape[0]] = torch.where(beg > 0, beg + pad_len, 0)
+            fake_token_len[batch_idx, : beg.shape[0]] = output["fake_token_len"][0]
+
+            if len(output["speech"]) > 0:
+                for speech, speech_len in zip(output["speech"], output["speech_lengths"][:, 0]):
+                    fbank.append(speech[:speech_len])
+                    fbank_lens.append(speech_len.view(1))
+            encoder_slots += output["encoder_slots"]
+            adaptor_slots += output["adaptor_slots"]
+
+        if len(fbank) > 0:
+            speech = torch.nn.utils.rnn.pad_sequence(fbank, batch_first=True, padding_value=0.0)
+            speech_lengths = torch.stack(fbank_lens)
+        else:
+            speech = []
+            speech_lengths = []
+
+        batch = {
+            "speech": speech,
+            "speech_lengths": speech_lengths,
+            "fbank_beg": fbank_beg,
+            "fake_token_len": fake_token_len,
+            "source_ids": source_ids,
+            "source_mask": source_mask,
+            "encoder_slots": encoder_slots,
+            "adaptor_slots": adaptor_slots,
+        }
+        if batch_size == 1:
+            # teacher forcing 只支持单条样本，沿用完整的输入序列
+            for name in ["input_ids", "attention_mask", "labels_ids", "target_ids"]:
+                batch[name] = outputs[0][name]
+        return batch
+
+    def merge_encoder_slots(self, encoder_slots: list, encoder_out=None, encoder_out_lens=None):
+        """按语音出现顺序合并预先计算的编码器输出与本批次新编码的输出
+
+        Args:
+            encoder_slots: 每段语音的编码器输出，None 表示取自 encoder_out
+            encoder_out: 本批次新编码的输出 [N, T, D]
+            encoder_out_lens: 本批次新编码的输出长度 [N]
+
+        Returns:
+            tuple: (encoder_out, encoder_out_lens)
+        """
+        merged, encoded_idx = [], 0
+        for slot in encoder_slots:
+            if slot is None:
+                merged.append(encoder_out[encoded_idx, : encoder_out_lens[encoded_idx]])
+                encoded_idx += 1
+            else:
+                merged.append(slot)
+        lens = torch.tensor([x.shape[0] for x in merged], dtype=torch.int32, device=merged[0].device)
+        return torch.nn.utils.rnn.pad_sequence(merged, batch_first=True, padding_value=0.0), lens
+
+    def inference_encode(self, data_in, tokenizer=None, frontend=None, **kwargs):
+        """加载数据、提取特征并运行音频编码器
+
+        Args:
+            data_in: ChatML 格式的输入列表
+            tokenizer: 分词器
+            frontend: 前端处理器
+
+        Returns:
+            tuple: (contents, batch, meta_data)，编码器输出在 meta_data["encoder_out"] 中
+        """
         meta_data = {}
 
-        if kwargs.get("batch_size", 1) > 1:
-            raise NotImplementedError("batch decoding is not implemented")
+        if kwargs.get("teacherforcing", False) and len(data_in) > 1:
+            raise NotImplementedError("teacher forcing only supports batch_size=1")
+
+        contents, outputs = [], []
+        load_data, extract_feat, batch_data_time = 0.0, 0.0, 0.0
+        for data in data_in:
+            contents_i = self.data_template(data)
+            meta_data_i = {}
+            output = self.data_load_speech(
+                contents_i, tokenizer, frontend, meta_data=meta_data_i, **kwargs
+            )
+            contents.append(contents_i)
+            outputs.append(output)
+            load_data += float(meta_data_i.get("load_data", 0))
+            extract_feat += float(meta_data_i.get("extract_feat", 0))
+            batch_data_time += meta_data_i.get("batch_data_time", 0)
+        meta_data["load_data"] = f"{load_data:0.3f}"
+        meta_data["extract_feat"] = f"{extract_feat:0.3f}"
+        meta_data["batch_data_time"] = batch_data_time
 
-        contents = self.data_template(data_in[0])
-        output = self.data_load_speech(contents, tokenizer, frontend, meta_data=meta_data, **kwargs)
-        batch = to_device(output, kwargs["device"])
+        batch = to_device(self.inference_collate(outputs), kwargs["device"])
 
         # audio encoder
         speech = batch["speech"]
+        encoder_slots = batch["encoder_slots"]
 
-        if len(speech) > 0:
+        if len(encoder_slots) > 0:
             if "audio_embedding" in kwargs and "audio_embedding_lens" in kwargs:
                 encoder_out = kwargs["audio_embedding"]
                 encoder_out_lens = kwargs["audio_embedding_lens"]
             else:
-                speech_lengths = batch["speech_lengths"][:, 0]
-                # fp16
-                if kwargs.get("fp16", False):
-                    speech = speech.to(torch.float16)
-                elif kwargs.get("bf16", False):
-                    speech = speech.to(torch.bfloat16)
-                # audio encoder
-                encoder_out, encoder_out_lens = self.encode(speech, speech_lengths)
-
-            # audio_adaptor
-            adaptor_out, adaptor_out_lens = self.audio_adaptor(encoder_out, encoder_out_lens)
+                if len(speech) > 0:
+                    speech_lengths = batch["speech_lengths"][:, 0]
+                    # fp16
+                    if kwargs.get("fp16", False):
+                        speech = speech.to(torch.float16)
+                    elif kwargs.get("bf16", False):
+                        speech = speech.to(torch.bfloat16)
+                    # audio encoder
+                    encoder_out, encoder_out_lens = self.encode(speech, speech_lengths)
+                if any(slot is not None for slot in encoder_slots):
+                    encoder_out, encoder_out_lens = self.merge_encoder_slots(
+                        encoder_slots,
+                        encoder_out if len(speech) > 0 else None,
+                        encoder_out_lens if len(speech) > 0 else None,
+                    )
             meta_data["encoder_out"] = encoder_out
             meta_data["encoder_out_lens"] = encoder_out_lens
+
+        return contents, batch, meta_data
+
+    def inference_prepare(
+        self,
+        data_in,
+        data_lengths=None,
+        key: list = None,
+        tokenizer=None,
+        frontend=None,
+        **kwargs,
+    ):
+        contents, batch, meta_data = self.inference_encode(data_in, tokenizer, frontend, **kwargs)
+        encoder_slots = batch["encoder_slots"]
+
+        if len(encoder_slots) > 0:
+            encoder_out = meta_data["encoder_out"]
+            encoder_out_lens = meta_data["encoder_out_lens"]
+
+            adaptor_slots = batch["adaptor_slots"]
+            if all(slot is not None for slot in adaptor_slots):
+                # 编码结果中已带有 adaptor 输出（ONNX Runtime 后端），不再运行 adaptor
+                adaptor_out, adaptor_out_lens = self.merge_encoder_slots(adaptor_slots)
+            else:
+                # audio_adaptor
+                adaptor_out, adaptor_out_lens = self.audio_adaptor(encoder_out, encoder_out_lens)
             meta_data["audio_adaptor_out"] = adaptor_out
             meta_data["audio_adaptor_out_lens"] = adaptor_out_lens
 
-        input_ids = batch["input_ids"]
         source_ids = batch["source_ids"]
         fbank_beg = batch["fbank_beg"]
         fake_token_len = batch["fake_token_len"]
 
-        if not kwargs.get("teacherforcing", False):
+        if kwargs.get("teacherforcing", False):
+            input_ids = batch["input_ids"]
+        else:
             input_ids = source_ids
+            batch["attention_mask"] = batch["source_mask"]
 
         input_ids[input_ids < 0] = 0
         inputs_embeds = self.llm.model.get_input_embeddings()(input_ids)
 
-        batch_size, token_num, dims = inputs_embeds.shape
-
         fake_token_len[fake_token_len < 0] = 0
         fbank_beg[fbank_beg < 0] = 0
 
-        speech_idx = 0
-        for batch_idx in range(batch_size):
-            for turn_id in range(fbank_beg.shape[1]):
-                fbank_beg_idx = fbank_beg[batch_idx, turn_id].item()
-                if fbank_beg_idx > 0:
-                    speech_token_len = fake_token_len[batch_idx, turn_id]
-                    speech_token = adaptor_out[speech_idx, :speech_token_len, :]
-
-                    try:
-                        inputs_embeds[
-                            batch_idx,
-                            fbank_beg_idx : fbank_beg_idx + speech_token_len,
-                            :,
-                        ] = speech_token
-                    except Exception as e:
-                        logging.error(f"{str(e)}, {traceback.format_exc()}")
-                        logging.info(
-                            f"batch_idx: {batch_idx}, inputs_embeds: {inputs_embeds.shape}, fbank_beg_idx: {fbank_beg_idx}, speech_token_len: {speech_token_len}, adaptor_out: {adaptor_out.shape}, adaptor_out_lens: {adaptor_out_lens}, fake_token_len: {fake_token_len}, speech_lengths: {speech_lengths}"
-                        )
-                        speech_token_len = adaptor_out_lens[speech_idx].item()
-                        speech_token = adaptor_out[speech_idx, :speech_token_len, :]
-                        inputs_embeds[
-                            batch_idx,
-                            fbank_beg_idx : fbank_beg_idx + speech_token_len,
-                            :,
-                        ] = speech_token
-
-                    speech_idx += 1
+        if len(encoder_slots) > 0:
+            splice_speech_embeds(
+                inputs_embeds, adaptor_out, adaptor_out_lens, fbank_beg, fake_token_len
+            )
         return inputs_embeds, contents, batch, source_ids, meta_data
 
     def get_prompt(self, hotwords: list[str], language: str = None, itn: bool = True):
@@ -587,23 +792,26 @@ class FunASRNano(nn.Module):
             prompt += "，不进行文本规整"
         return prompt + "："
 
-    def generate_chatml(self, prompt: str, data: Union[str, torch.Tensor]):
+    def generate_chatml(self, prompt: str, data: Union[str, torch.Tensor, np.ndarray, dict]):
         """生成 ChatML 格式数据
         
         Args:
             prompt: 提示词
-            data: 音频文件路径或音频张量
+            data: 音频文件路径、音频张量 / numpy 数组（采样率为 frontend.fs），
+                或包含 "encoder_out"（可附带 "adaptor_out"）/ "fbank" 的预计算特征字典
             
         Returns:
             list: ChatML 格式的对话数据
         """
+        if isinstance(data, np.ndarray):
+            data = torch.from_numpy(data)
         if isinstance(data, str):
             return [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {"role": "user", "content": f"{prompt}<|startofspeech|>!{data}<|endofspeech|>"},
                 {"role": "assistant", "content": "null"},
             ]
-        elif isinstance(data, torch.Tensor):
+        elif isinstance(data, (torch.Tensor, dict)):
             return [
                 {"role": "system", "content": "You are a helpful assistant."},
                 {
@@ -635,13 +843,29 @@ class FunASRNano(nn.Module):
                 - hotwords: 热词列表
                 - language: 语言
                 - itn: 是否进行文本规整
+                - mode: "llm"（默认）或 "ctc"，"ctc" 只返回 CTC 分支的结果
+                - timestamps: 计算哪些文本的时间戳，"none"、"ctc"、"llm" 或 "both"（默认）
+                - packing: 把多条短语音打包进同一个多轮对话上下文解码，见 inference_packed()
+                - batch_frontend: 批次内的音频一次性计算 fbank 特征（默认开启），见 fbank_batch()
                 
         Returns:
             tuple: (识别结果列表, 元数据)
         """
+        mode = kwargs.get("mode", "llm")
+        if mode not in ("llm", "ctc"):
+            raise ValueError(f"unknown mode: {mode}")
+        if mode == "llm" and self.llm is None:
+            raise ValueError("LLM is not loaded (load_llm=False), only mode='ctc' is available")
+        if mode == "llm":
+            # 在编码之前拒绝与加载时精度不一致的请求
+            self.resolve_llm_dtype(**kwargs)
+        if kwargs.get("timestamps", "both") not in (None, "none", "ctc", "llm", "both"):
+            raise ValueError(f"unknown timestamps option: {kwargs['timestamps']}")
         prompt = self.get_prompt(
             kwargs.get("hotwords", []), kwargs.get("language", None), kwargs.get("itn", True)
         )
+        if kwargs.get("batch_frontend", True):
+            data_in = self.prepare_fbank_inputs(data_in, frontend, **kwargs)
         data_in = [self.generate_chatml(prompt, data) for data in data_in]
 
         if key is None:
@@ -650,7 +874,10 @@ class FunASRNano(nn.Module):
                 chars = string.ascii_letters + string.digits
                 key.append("rand_key_" + "".join(random.choice(chars) for _ in range(13)))
 
-        return self.inference_llm(
+        inference_fn = self.inference_ctc if mode == "ctc" else self.inference_llm
+        if mode == "llm" and kwargs.get("packing", False):
+            inference_fn = self.inference_packed
+        return inference_fn(
             data_in,
             data_lengths=data_lengths,
             key=key,
@@ -659,6 +886,237 @@ class FunASRNano(nn.Module):
             **kwargs,
         )
 
+    def set_llm_precision(self, llm_dtype: str):
+        """切换 LLM 精度配置并转换一次权重，只应在加载模型时调用
+
+        Args:
+            llm_dtype: 精度配置，取值见 precision_profiles
+        """
+        if llm_dtype not in precision_profiles:
+            raise ValueError(f"不支持的 llm_dtype: {llm_dtype}，可选: {list(precision_profiles)}")
+        self.llm_dtype = llm_dtype
+        if self.llm is not None:
+            self.llm.to(dtype_map[precision_profiles[llm_dtype][0]])
+
+    def resolve_llm_dtype(self, **kwargs) -> str:
+        """确定本次请求的 LLM 计算精度
+
+        请求中的 llm_dtype / fp16 / bf16 必须与加载时的精度配置一致，
+        推理时不会为单个请求转换 LLM 权重。
+
+        Returns:
+            str: 计算精度，"fp32"、"fp16" 或 "bf16"
+        """
+        compute_dtype = precision_profiles[self.llm_dtype][1]
+        requested = kwargs.get("llm_dtype", None)
+        if requested is None:
+            if kwargs.get("fp16", False):
+                requested = "fp16"
+            elif kwargs.get("bf16", False):
+                requested = "bf16"
+        if requested is not None and requested not in (self.llm_dtype, compute_dtype):
+            raise ValueError(
+                f"LLM 精度在加载时固定为 {self.llm_dtype}，不支持按请求切换为 {requested}，"
+                f"请以对应的 llm_dtype 加载另一个模型"
+            )
+        return compute_dtype
+
+    def generation_budgets(self, meta_data: dict, llm_index: list, num_items: int, **kwargs):
+        """按音频时长计算 LLM 子批次中每条语音的生成 token 上限
+
+        Args:
+            meta_data: inference_encode() 的元数据，需含 encoder_out_lens
+            llm_index: 需要 LLM 生成的条目
+            num_items: 批次中的条目数
+            **kwargs: 其他参数
+                - early_stop: 是否启用提前终止（重复循环检测），默认 True
+                - max_length: 最大生成 token 数
+                - tokens_per_second: 每秒语音允许生成的 token 数，默认 None，
+                  即不按时长限制，上限均为 max_length
+
+        Returns:
+            list: 每条的 token 上限，未启用或无法确定时长时返回 None
+        """
+        encoder_out_lens = meta_data.get("encoder_out_lens", None)
+        if not kwargs.get("early_stop", True) or encoder_out_lens is None:
+            return None
+        # 多轮对话中一条输入含多段语音时无法与条目一一对应
+        if len(encoder_out_lens) != num_items:
+            return None
+        max_length = kwargs.get("max_length", 512)
+        tokens_per_second = kwargs.get("tokens_per_second", None)
+        if tokens_per_second is None:
+            return [max_length] * len(llm_index)
+        # 编码器每帧 60ms（LFR 6 帧 x 10ms）
+        durations = (encoder_out_lens.float() * 6 * 10 / 1000).tolist()
+        return token_budget(
+            [durations[i] for i in llm_index],
+            max_length=max_length,
+            tokens_per_second=tokens_per_second,
+        )
+
+    def acquire_static_cache(self, inputs_embeds, **kwargs):
+        """取出（或新建）预分配的静态 KV 缓存，并准备解码步的 torch.compile 配置
+
+        缓存长度为输入长度与 max_length 之和，向上取整到 static_cache_bucket 的倍数。
+        形状相同的请求复用同一个缓存与同一份编译结果，长度相近的请求不会重新编译。
+
+        Args:
+            inputs_embeds: 输入嵌入 [B, T, D]
+            **kwargs: 其他参数
+                - max_length: 最大生成 token 数
+                - static_cache_bucket: 缓存长度的取整粒度
+
+        Returns:
+            tuple: (缓存键, StaticCache)，用完后调用 release_static_cache() 归还
+        """
+        from transformers import StaticCache
+        from transformers.generation import CompileConfig
+
+        bucket = kwargs.get("static_cache_bucket", 256)
+        max_cache_len = inputs_embeds.shape[1] + kwargs.get("max_length", 512)
+        max_cache_len = (max_cache_len + bucket - 1) // bucket * bucket
+        cache_key = (inputs_embeds.shape[0], max_cache_len, inputs_embeds.dtype, str(inputs_embeds.device))
+        cache = self.static_caches.pop(cache_key, None)
+        if cache is None:
+            cache = StaticCache(config=self.llm.config, max_cache_len=max_cache_len)
+        else:
+            cache.reset()
+        if self.compile_config is None:
+            # 默认只在 GPU 上自动编译，这里允许 CPU 也编译解码步
+            self.compile_config = CompileConfig(dynamic=False)
+            self.compile_config._compile_all_devices = True
+        return cache_key, cache
+
+    def release_static_cache(self, cache_key, cache, **kwargs):
+        """归还静态 KV 缓存，缓存池超过 max_static_caches 个时丢弃最早放入的"""
+        self.static_caches[cache_key] = cache
+        while len(self.static_caches) > kwargs.get("max_static_caches", 4):
+            self.static_caches.pop(next(iter(self.static_caches)))
+
+    def prefix_past_key_values(
+        self, inputs_embeds, source_ids, fbank_beg, attention_mask, prefix_cache, llm_dtype
+    ):
+        """取出（或计算并缓存）<|startofspeech|> 之前静态前缀的 past_key_values
+
+        前缀 token 序列由系统提示词、热词、语言和 itn 唯一确定，作为缓存键。
+        批次内存在左填充或各条前缀不同时不使用缓存。
+
+        Args:
+            inputs_embeds: 输入嵌入 [B, T, D]
+            source_ids: 输入 token [B, T]
+            fbank_beg: 每轮语音的起始位置 [B, turns]
+            attention_mask: 注意力掩码 [B, T]
+            prefix_cache: PrefixKVCache 实例
+            llm_dtype: LLM 计算精度
+
+        Returns:
+            可传给 generate 的 past_key_values，不适用时返回 None
+        """
+        if attention_mask is not None and not bool(attention_mask.all()):
+            return None
+        prefix_len = int(fbank_beg[:, 0].min())
+        if prefix_len <= 0 or prefix_len >= inputs_embeds.shape[1]:
+            return None
+        prefix_ids = source_ids[:, :prefix_len]
+        if not bool((prefix_ids == prefix_ids[:1]).all()):
+            return None
+
+        cache_key = (llm_dtype, tuple(prefix_ids[0].tolist()))
+        legacy_cache = prefix_cache.get(cache_key)
+        if legacy_cache is None:
+            with torch.no_grad():
+                outputs = self.llm(inputs_embeds=inputs_embeds[:1, :prefix_len], use_cache=True)
+            legacy_cache = prefix_cache.put(cache_key, outputs.past_key_values)
+        return prefix_cache.to_past_key_values(legacy_cache, batch_size=inputs_embeds.shape[0])
+
+    def speculative_generate(
+        self,
+        inputs_embeds,
+        source_ids,
+        fbank_beg,
+        attention_mask,
+        ctc_results,
+        tokenizer,
+        llm_dtype,
+        budgets=None,
+        **kwargs,
+    ):
+        """以 CTC 识别结果为草稿的推测解码，逐条去掉左填充后解码
+
+        输出与贪心解码一致；llm_kwargs 中的采样参数不生效。
+
+        Args:
+            inputs_embeds: 输入嵌入 [B, T, D]
+            source_ids: 输入 token [B, T]
+            fbank_beg: 每轮语音的起始位置 [B, turns]
+            attention_mask: 注意力掩码 [B, T]
+            ctc_results: ctc_decode() 的结果
+            tokenizer: LLM 分词器
+            llm_dtype: LLM 计算精度
+            budgets: 每条的生成 token 上限，None 时不检测提前终止
+            **kwargs: 其他参数
+                - max_length: 最大生成 token 数
+                - num_draft_tokens: 每次前向最多校验的草稿 token 数
+                - prefix_cache: 提示词前缀 KV 缓存
+                - streamer: 逐 token 输出的流式对象（只支持单条）
+
+        Returns:
+            tuple: (每条生成的 token 列表, 每条的统计信息)，统计信息中 early_stop
+                为提前终止原因（"repetition"、"budget" 或 None）
+        """
+        eos_token_id = self.llm.config.eos_token_id
+        if isinstance(eos_token_id, (list, tuple)):
+            eos_token_id = eos_token_id[0]
+        prefix_cache = kwargs.get("prefix_cache", None)
+        window = repetition_window()
+
+        generated_ids, stats = [], []
+        for i, ctc_result in enumerate(ctc_results):
+            pad_len = 0
+            if attention_mask is not None:
+                pad_len = int((attention_mask[i] == 0).sum())
+            embeds_i = inputs_embeds[i : i + 1, pad_len:]
+            past_key_values = None
+            if prefix_cache is not None:
+                fbank_beg_i = fbank_beg[i : i + 1]
+                past_key_values = self.prefix_past_key_values(
+                    embeds_i,
+                    source_ids[i : i + 1, pad_len:],
+                    torch.where(fbank_beg_i > 0, fbank_beg_i - pad_len, 0),
+                    None,
+                    prefix_cache,
+                    llm_dtype,
+                )
+            draft_ids = tokenizer.encode(
+                ctc_result["text"].replace("<|nospeech|>", ""), add_special_tokens=False
+            )
+            if eos_token_id is not None:
+                draft_ids = draft_ids + [eos_token_id]
+            ids, stats_i = draft_generate(
+                self.llm,
+                embeds_i,
+                draft_ids,
+                max_new_tokens=budgets[i] if budgets is not None else kwargs.get("max_length", 512),
+                num_draft_tokens=kwargs.get("num_draft_tokens", 16),
+                past_key_values=past_key_values,
+                stop_fn=(lambda tokens: has_repetition(tokens[-window:])) if budgets is not None else None,
+                streamer=kwargs.get("streamer", None),
+            )
+            stats_i["early_stop"] = None
+            if stats_i.pop("stopped"):
+                stats_i["early_stop"] = "repetition"
+            elif (
+                budgets is not None
+                and budgets[i] < kwargs.get("max_length", 512)
+                and not stats_i["eos"]
+                and len(ids) >= budgets[i]
+            ):
+                stats_i["early_stop"] = "budget"
+            generated_ids.append(ids)
+            stats.append(stats_i)
+        return generated_ids, stats
+
     def inference_llm(
         self,
         data_in,
@@ -674,30 +1132,11 @@ class FunASRNano(nn.Module):
 
         ctc_results = []
         if self.ctc_decoder is not None:
-            encoder_out = meta_data["encoder_out"]
-            encoder_out_lens = meta_data["encoder_out_lens"]
-            decoder_out, decoder_out_lens = self.ctc_decoder(encoder_out, encoder_out_lens)
-            ctc_logits = self.ctc.log_softmax(decoder_out)
-
-            b, n, d = encoder_out.size()
-            if isinstance(key[0], (list, tuple)):
-                key = key[0]
-            if len(key) < b:
-                key = key * b
-            for i in range(b):
-                x = ctc_logits[i, : encoder_out_lens[i].item(), :]
-                yseq = x.argmax(dim=-1)
-                yseq = torch.unique_consecutive(yseq, dim=-1)
-                mask = yseq != self.blank_id
-                token_int = yseq[mask].tolist()
-                # Change integer-ids to tokens
-                text = self.ctc_tokenizer.decode(token_int)
-                ctc_results.append({"key": key[i], "text": text, "ctc_logits": x})
-
-        llm_dtype = kwargs.get("llm_dtype", "fp32")
-        if llm_dtype == "fp32":
-            llm_dtype = "fp16" if kwargs.get("fp16", False) else llm_dtype
-            llm_dtype = "bf16" if kwargs.get("bf16", False) else llm_dtype
+            ctc_results = self.ctc_decode(
+                meta_data["encoder_out"], meta_data["encoder_out_lens"], key
+            )
+
+        llm_dtype = self.resolve_llm_dtype(**kwargs)
 
         device_type = torch.device(kwargs.get("device", "cuda")).type
         with torch.autocast(
@@ -705,24 +1144,143 @@ class FunASRNano(nn.Module):
             enabled=True if llm_dtype != "fp32" else False,
             dtype=dtype_map[llm_dtype],
         ):
-            label = contents["assistant"][-1]
-            self.llm = self.llm.to(dtype_map[llm_dtype])
-            inputs_embeds = inputs_embeds.to(dtype_map[llm_dtype])
+            labels = [contents_i["assistant"][-1] for contents_i in contents]
+            inputs_embeds = inputs_embeds.to(dtype_map[precision_profiles[self.llm_dtype][0]])
             llm_kwargs = kwargs.get("llm_kwargs", {})
             if not kwargs.get("teacherforcing", False):
                 attention_mask = batch.get("attention_mask", None)
-                generated_ids = self.llm.generate(
-                    inputs_embeds=inputs_embeds,
-                    attention_mask=attention_mask,
-                    max_new_tokens=kwargs.get("max_length", 512),
-                    pad_token_id=self.llm.config.pad_token_id or self.llm.config.eos_token_id,
-                    **llm_kwargs,
-                )
-
-                response = tokenizer.batch_decode(
-                    generated_ids,
-                    skip_special_tokens=kwargs.get("skip_special_tokens", True),
-                )[0]
+                fbank_beg = batch["fbank_beg"]
+                responses = [None] * len(contents)
+                speculative_stats = [None] * len(contents)
+                early_stops = [None] * len(contents)
+                decoders = ["llm"] * len(contents)
+                llm_index = list(range(len(contents)))
+
+                # 级联：CTC 置信度不低于阈值的语音直接采用 CTC 结果，不调用 LLM
+                cascade_threshold = kwargs.get("cascade_threshold", None)
+                if cascade_threshold is not None and len(ctc_results) > 0:
+                    ctc_texts = [r["text"].replace("<|nospeech|>", "") for r in ctc_results]
+                    ctc_timestamps = self.align_timestamps(
+                        [r["ctc_logits"] for r in ctc_results], ctc_texts
+                    )
+                    for i, ctc_result in enumerate(ctc_results):
+                        ctc_result["timestamps"] = ctc_timestamps[i]
+                        ctc_result["confidence"] = self.ctc_confidence(
+                            ctc_result["ctc_logits"], ctc_timestamps[i]
+                        )
+                        if ctc_result["confidence"] >= cascade_threshold:
+                            responses[i] = ctc_texts[i]
+                            decoders[i] = "ctc"
+                    llm_index = [i for i, decoder in enumerate(decoders) if decoder == "llm"]
+                    meta_data["cascade"] = {
+                        "ctc": len(contents) - len(llm_index),
+                        "llm": len(llm_index),
+                    }
+
+                if len(llm_index) > 0:
+                    if len(llm_index) < len(contents):
+                        index = torch.tensor(llm_index, device=inputs_embeds.device)
+                        inputs_embeds = inputs_embeds.index_select(0, index)
+                        source_ids = source_ids.index_select(0, index)
+                        fbank_beg = fbank_beg.index_select(0, index.to(fbank_beg.device))
+                        if attention_mask is not None:
+                            attention_mask = attention_mask.index_select(0, index)
+                            # 去掉子批次中全部为填充的左侧列
+                            pad_len = int((attention_mask == 0).sum(dim=1).min())
+                            inputs_embeds = inputs_embeds[:, pad_len:]
+                            source_ids = source_ids[:, pad_len:]
+                            attention_mask = attention_mask[:, pad_len:]
+                            fbank_beg = torch.where(fbank_beg > 0, fbank_beg - pad_len, 0)
+                    if kwargs.get("prefix_cache", None) is not None:
+                        past_key_values = self.prefix_past_key_values(
+                            inputs_embeds,
+                            source_ids,
+                            fbank_beg,
+                            attention_mask,
+                            kwargs["prefix_cache"],
+                            llm_dtype,
+                        )
+                        if past_key_values is not None:
+                            llm_kwargs = {**llm_kwargs, "past_key_values": past_key_values}
+                    budgets = self.generation_budgets(meta_data, llm_index, len(contents), **kwargs)
+                    streamer = kwargs.get("streamer", None)
+                    if streamer is not None:
+                        if len(llm_index) > 1:
+                            raise ValueError("streamer 只支持 batch_size=1")
+                        llm_kwargs = {**llm_kwargs, "streamer": streamer}
+                    if kwargs.get("speculative", False) and len(ctc_results) > 0:
+                        generated_ids, llm_stats = self.speculative_generate(
+                            inputs_embeds,
+                            source_ids,
+                            fbank_beg,
+                            attention_mask,
+                            [ctc_results[i] for i in llm_index],
+                            tokenizer,
+                            llm_dtype,
+                            budgets=budgets,
+                            **kwargs,
+                        )
+                        meta_data["speculative"] = summarize_stats(llm_stats)
+                        for i, stats in zip(llm_index, llm_stats):
+                            speculative_stats[i] = stats
+                            early_stops[i] = stats["early_stop"]
+                    else:
+                        static_cache = None
+                        if kwargs.get("static_cache", False) and "past_key_values" not in llm_kwargs:
+                            cache_key, static_cache = self.acquire_static_cache(
+                                inputs_embeds, **kwargs
+                            )
+                            llm_kwargs = {
+                                **llm_kwargs,
+                                "past_key_values": static_cache,
+                                "compile_config": self.compile_config,
+                            }
+                        stopping = None
+                        if budgets is not None:
+                            stopping = EarlyStopping(
+                                budgets,
+                                eos_token_ids(self.llm),
+                                max_length=kwargs.get("max_length", 512),
+                            )
+                            llm_kwargs = {**llm_kwargs, "stopping_criteria": [stopping]}
+                        try:
+                            generated_ids = self.llm.generate(
+                                inputs_embeds=inputs_embeds,
+                                attention_mask=attention_mask,
+                                max_new_tokens=(
+                                    max(budgets)
+                                    if budgets is not None
+                                    else kwargs.get("max_length", 512)
+                                ),
+                                pad_token_id=self.llm.config.pad_token_id
+                                or self.llm.config.eos_token_id,
+                                **llm_kwargs,
+                            )
+                        finally:
+                            # 生成出错时同样归还缓存，下次取用时会先 reset()
+                            if static_cache is not None:
+                                self.release_static_cache(cache_key, static_cache, **kwargs)
+                        if stopping is not None:
+                            for i, reason in zip(llm_index, stopping.reasons):
+                                early_stops[i] = reason
+
+                    llm_responses = tokenizer.batch_decode(
+                        generated_ids,
+                        skip_special_tokens=kwargs.get("skip_special_tokens", True),
+                    )
+                    for i, response in zip(llm_index, llm_responses):
+                        responses[i] = response
+
+                    # 陷入重复循环的语音改用 CTC 结果
+                    for i in llm_index:
+                        if early_stops[i] == "repetition" and len(ctc_results) > 0:
+                            responses[i] = ctc_results[i]["text"].replace("<|nospeech|>", "")
+                            decoders[i] = "ctc"
+                    if any(reason is not None for reason in early_stops):
+                        meta_data["early_stop"] = {
+                            "repetition": early_stops.count("repetition"),
+                            "budget": early_stops.count("budget"),
+                        }
 
                 loss = None
             else:
@@ -738,13 +1296,21 @@ class FunASRNano(nn.Module):
                 )
 
                 preds = torch.argmax(model_outputs.logits, -1)[:, source_ids.shape[1] :]
-                response = tokenizer.batch_decode(
+                responses = tokenizer.batch_decode(
                     preds,
                     add_special_tokens=False,
                     skip_special_tokens=kwargs.get("skip_special_tokens", True),
-                )[0]
+                )
                 loss = model_outputs.loss.item()
-            response = kwargs.get("prev_text", "") + response
+                speculative_stats = [None] * len(responses)
+                early_stops = [None] * len(responses)
+                decoders = ["llm"] * len(responses)
+            responses = [kwargs.get("prev_text", "") + response for response in responses]
+
+        if isinstance(key[0], (list, tuple)):
+            key = key[0]
+        if len(key) < len(responses):
+            key = key * len(responses)
 
         ibest_writer = None
         if kwargs.get("output_dir") is not None:
@@ -753,38 +1319,378 @@ class FunASRNano(nn.Module):
             ibest_writer = self.writer[f"{0 + 1}best_recog"]
 
         results = []
-        response_clean = re.sub(r"[^\w\s\u3000\u4e00-\u9fff]+", "", response)
-        result_i = {
-            "key": key[0],
-            "text": re.sub(r"\s+", " ", response.replace("/sil", " ")),
-            "text_tn": response_clean,
-            "label": label,
-        }
-        if loss is not None:
-            result_i["loss"] = loss
-        results.append(result_i)
+        for i, (response, label) in enumerate(zip(responses, labels)):
+            response_clean = re.sub(r"[^\w\s\u3000\u4e00-\u9fff]+", "", response)
+            result_i = {
+                "key": key[i],
+                "text": normalize_response(response),
+                "text_tn": response_clean,
+                "label": label,
+            }
+            if loss is not None:
+                result_i["loss"] = loss
+            if speculative_stats[i] is not None:
+                result_i["speculative"] = speculative_stats[i]
+            if early_stops[i] is not None:
+                result_i["early_stop"] = early_stops[i]
+            result_i["decoder"] = decoders[i]
+            results.append(result_i)
+
+            if ibest_writer is not None:
+                ibest_writer["text"][key[i]] = response.replace("\n", " ")
+                ibest_writer["label"][key[i]] = label.replace("\n", " ")
+                ibest_writer["text_tn"][key[i]] = response_clean
 
         for ctc_result, result in zip(ctc_results, results):
             result["ctc_text"] = ctc_result["text"].replace("<|nospeech|>", "")
-            target_ids = torch.tensor(
-                self.ctc_tokenizer.encode(result["ctc_text"]), dtype=torch.int64
-            )
-            result["ctc_timestamps"] = forced_align(
-                ctc_result["ctc_logits"], target_ids, self.blank_id
+            if "confidence" in ctc_result:
+                result["confidence"] = ctc_result["confidence"]
+        if len(ctc_results) > 0:
+            self.add_timestamps(results, ctc_results, **kwargs)
+
+        return results, meta_data
+
+    def inference_packed(
+        self,
+        data_in,
+        data_lengths=None,
+        key: list = None,
+        tokenizer=None,
+        frontend=None,
+        **kwargs,
+    ):
+        """把多条短语音打包进同一个多轮对话上下文逐轮解码
+
+        第一条语音按单轮 ChatML 预填充（含系统提示词），之后每条语音作为新一轮
+        "<|im_start|>user" 输入接在上一轮 assistant 输出与 "<|im_end|>"、换行之后，
+        沿用同一个 KV 缓存，每轮的输出即该条语音的识别结果。系统提示词每包只预填充一次；上下文加上
+        预留的生成长度超过 max_token_length 时开始新的一包。音频编码器与 adaptor
+        对整个批次一次运行。
+
+        Args:
+            data_in: ChatML 格式的输入列表
+            data_lengths: 数据长度
+            key: 键列表
+            tokenizer: 分词器
+            frontend: 前端处理器
+            **kwargs: 其他参数
+                - max_token_length: 每包上下文的最大 token 数，默认 1500
+                - max_length: 每条最大生成 token 数
+                - speculative: 以 CTC 结果为草稿做推测解码
+                - prefix_cache: 提示词前缀 KV 缓存，用于每包的第一轮
+
+        Returns:
+            tuple: (识别结果列表, 元数据)，结果中 pack 为所在包的序号
+        """
+        from transformers import DynamicCache
+
+        inputs_embeds, contents, batch, source_ids, meta_data = self.inference_prepare(
+            data_in, data_lengths, key, tokenizer, frontend, **kwargs
+        )
+        ctc_results = []
+        if self.ctc_decoder is not None:
+            ctc_results = self.ctc_decode(
+                meta_data["encoder_out"], meta_data["encoder_out_lens"], key
             )
-            target_ids = torch.tensor(self.ctc_tokenizer.encode(result["text"]), dtype=torch.int64)
-            result["timestamps"] = forced_align(ctc_result["ctc_logits"], target_ids, self.blank_id)
-            for timestamps in [result["timestamps"], result["ctc_timestamps"]]:
-                for timestamp in timestamps:
-                    timestamp["token"] = self.ctc_tokenizer.decode([timestamp["token"]])
-                    timestamp["start_time"] = timestamp["start_time"] * 6 * 10 / 1000
-                    timestamp["end_time"] = timestamp["end_time"] * 6 * 10 / 1000
-
-        if ibest_writer is not None:
-            ibest_writer["text"][key[0]] = response.replace("\n", " ")
-            ibest_writer["label"][key[0]] = label.replace("\n", " ")
-            ibest_writer["text_tn"][key[0]] = response_clean
+        llm_dtype = self.resolve_llm_dtype(**kwargs)
+        inputs_embeds = inputs_embeds.to(dtype_map[precision_profiles[self.llm_dtype][0]])
+        attention_mask = batch["attention_mask"]
+        fbank_beg = batch["fbank_beg"]
+        num_items = len(contents)
+        pad_lens = (attention_mask == 0).sum(dim=1).tolist()
+        lengths = [source_ids.shape[1] - pad_len for pad_len in pad_lens]
+
+        # 第二轮起去掉 "<|im_start|>system\n...<|im_end|>\n"，从 "<|im_start|>user" 开始。
+        # 前缀长度取自完整提示词的编码：语音之前的文本去掉末尾与第二轮起的同一段编码相同的部分
+        prefix_len = 0
+        if kwargs.get("dataset_conf", {}).get("sys_prompt", True):
+            user_prompt = contents[0]["user"][0]
+            if isinstance(user_prompt, (list, tuple)):
+                user_prompt = user_prompt[0]
+            user_head = user_prompt.split("<|startofspeech|>")[0]
+            turn_head = tokenizer.encode(f"<|im_start|>user\n{user_head}")
+            head_len = int(fbank_beg[0, 0]) - pad_lens[0]
+            prefix_len = head_len - len(turn_head)
+            head_ids = source_ids[0, pad_lens[0] : pad_lens[0] + head_len].tolist()
+            if fbank_beg[0, 0] <= 0 or prefix_len < 0 or head_ids[prefix_len:] != turn_head:
+                logging.warning("系统提示词与用户轮次的编码边界不一致，不打包，逐条解码")
+                prefix_len = None
+
+        budgets = self.generation_budgets(meta_data, list(range(num_items)), num_items, **kwargs)
+        if budgets is None:
+            budgets = [kwargs.get("max_length", 512)] * num_items
+
+        eos_token_id = self.llm.config.eos_token_id
+        if isinstance(eos_token_id, (list, tuple)):
+            eos_token_id = eos_token_id[0]
+        # 每轮输出之后补上 "<|im_end|>\n"，与 ChatML 模板中轮次之间的分隔一致
+        turn_end_ids = [eos_token_id] + tokenizer.encode("\n")
+
+        # 按上下文长度上限分包，每轮预留生成长度与补上的轮次结尾
+        max_token_length = kwargs.get("max_token_length", 1500)
+        packs, pack, used = [], [], 0
+        for i in range(num_items):
+            need = lengths[i] + budgets[i] + len(turn_end_ids)
+            if pack and prefix_len is not None and used + need - prefix_len <= max_token_length:
+                need -= prefix_len
+            elif pack:
+                packs.append(pack)
+                pack, used = [], 0
+            pack.append(i)
+            used += need
+        if pack:
+            packs.append(pack)
+
+        embed_tokens = self.llm.get_input_embeddings()
+        window = repetition_window()
+        prefix_cache = kwargs.get("prefix_cache", None)
+        responses = [None] * num_items
+        decoders = ["llm"] * num_items
+        early_stops = [None] * num_items
+        pack_index = [None] * num_items
+        llm_stats = []
+
+        device_type = torch.device(kwargs.get("device", "cuda")).type
+        with torch.autocast(
+            device_type=device_type if device_type in ["cuda", "xpu", "mps"] else "cpu",
+            enabled=True if llm_dtype != "fp32" else False,
+            dtype=dtype_map[llm_dtype],
+        ):
+            for p, pack in enumerate(packs):
+                context, past_key_values = [], None
+                for j, i in enumerate(pack):
+                    embeds_i = inputs_embeds[i : i + 1, pad_lens[i] :]
+                    if j == 0:
+                        if prefix_cache is not None:
+                            fbank_beg_i = fbank_beg[i : i + 1]
+                            past_key_values = self.prefix_past_key_values(
+                                embeds_i,
+                                source_ids[i : i + 1, pad_lens[i] :],
+                                torch.where(fbank_beg_i > 0, fbank_beg_i - pad_lens[i], 0),
+                                None,
+                                prefix_cache,
+                                llm_dtype,
+                            )
+                        if past_key_values is None:
+                            past_key_values = DynamicCache()
+                        context.append(embeds_i)
+                    else:
+                        context.append(embeds_i[:, prefix_len:])
+
+                    draft_ids = []
+                    if kwargs.get("speculative", False) and len(ctc_results) > 0:
+                        draft_ids = tokenizer.encode(
+                            ctc_results[i]["text"].replace("<|nospeech|>", ""),
+                            add_special_tokens=False,
+                        ) + [eos_token_id]
+                    ids, stats = draft_generate(
+                        self.llm,
+                        torch.cat(context, dim=1),
+                        draft_ids,
+                        max_new_tokens=budgets[i],
+                        num_draft_tokens=kwargs.get("num_draft_tokens", 16),
+                        past_key_values=past_key_values,
+                        stop_fn=lambda tokens: has_repetition(tokens[-window:]),
+                    )
+                    llm_stats.append(stats)
+                    if stats["stopped"]:
+                        early_stops[i] = "repetition"
+                    elif (
+                        budgets[i] < kwargs.get("max_length", 512)
+                        and not stats["eos"]
+                        and len(ids) >= budgets[i]
+                    ):
+                        early_stops[i] = "budget"
+                    # 本轮输出以 "<|im_end|>\n" 收尾后作为下一轮的上文
+                    output_ids = torch.tensor([ids + turn_end_ids], device=inputs_embeds.device)
+                    context.append(embed_tokens(output_ids).to(inputs_embeds.dtype))
+                    # 推测解码或提前终止时缓存可能含有输出之后的草稿 token，只保留到本轮输出
+                    context_len = sum(embeds.shape[1] for embeds in context) - len(turn_end_ids)
+                    if past_key_values.get_seq_length() > context_len:
+                        past_key_values.crop(context_len)
+                    responses[i] = tokenizer.decode(
+                        ids, skip_special_tokens=kwargs.get("skip_special_tokens", True)
+                    )
+                    pack_index[i] = p
+
+        for i in range(num_items):
+            if early_stops[i] == "repetition" and len(ctc_results) > 0:
+                responses[i] = ctc_results[i]["text"].replace("<|nospeech|>", "")
+                decoders[i] = "ctc"
+        meta_data["packing"] = {"packs": len(packs), "items": num_items}
+        meta_data["speculative"] = summarize_stats(llm_stats)
+        if any(reason is not None for reason in early_stops):
+            meta_data["early_stop"] = {
+                "repetition": early_stops.count("repetition"),
+                "budget": early_stops.count("budget"),
+            }
+
+        if isinstance(key[0], (list, tuple)):
+            key = key[0]
+        if len(key) < num_items:
+            key = key * num_items
+        results = []
+        for i, response in enumerate(responses):
+            response = kwargs.get("prev_text", "") + response
+            result_i = {
+                "key": key[i],
+                "text": normalize_response(response),
+                "text_tn": re.sub(r"[^\w\s\u3000\u4e00-\u9fff]+", "", response),
+                "label": contents[i]["assistant"][-1],
+                "pack": pack_index[i],
+            }
+            if early_stops[i] is not None:
+                result_i["early_stop"] = early_stops[i]
+            result_i["decoder"] = decoders[i]
+            results.append(result_i)
+
+        for ctc_result, result in zip(ctc_results, results):
+            result["ctc_text"] = ctc_result["text"].replace("<|nospeech|>", "")
+        if len(ctc_results) > 0:
+            self.add_timestamps(results, ctc_results, **kwargs)
+
+        return results, meta_data
+
+    def add_timestamps(self, results: list, ctc_results: list, **kwargs):
+        """按 timestamps 选项对齐 LLM 文本和/或 CTC 文本，写入 results
+
+        所有需要对齐的文本在一次批量强制对齐中完成；级联中已对齐过的 CTC 文本直接复用。
+
+        Args:
+            results: 识别结果，需含 text 与 ctc_text
+            ctc_results: ctc_decode() 的结果
+            **kwargs: 其他参数
+                - timestamps: "none"、"ctc"、"llm" 或 "both"（默认）
+                - timestamp_format: 为 "dict" 时时间戳为 dict 列表
+        """
+        option = kwargs.get("timestamps", "both") or "none"
+        if option not in ("none", "ctc", "llm", "both"):
+            raise ValueError(f"unknown timestamps option: {option}")
+        timestamp_format = kwargs.get("timestamp_format", None)
+
+        ctc_logits, texts, targets = [], [], []
+        for i, (ctc_result, result) in enumerate(zip(ctc_results, results)):
+            if option in ("llm", "both"):
+                ctc_logits.append(ctc_result["ctc_logits"])
+                texts.append(result["text"])
+                targets.append((i, "timestamps"))
+            if option in ("ctc", "both"):
+                if "timestamps" in ctc_result:
+                    result["ctc_timestamps"] = self.format_timestamps(
+                        ctc_result["timestamps"], timestamp_format
+                    )
+                else:
+                    ctc_logits.append(ctc_result["ctc_logits"])
+                    texts.append(result["ctc_text"])
+                    targets.append((i, "ctc_timestamps"))
+        if len(texts) == 0:
+            return
+        timestamps = self.align_timestamps(ctc_logits, texts, timestamp_format)
+        for (i, name), timestamps_i in zip(targets, timestamps):
+            results[i][name] = timestamps_i
+
+    def ctc_decode(self, encoder_out, encoder_out_lens, key: list):
+        """CTC 贪心解码
+
+        Args:
+            encoder_out: 编码器输出 [B, T, D]
+            encoder_out_lens: 编码器输出长度 [B]
+            key: 键列表
+
+        Returns:
+            list: 每条音频的 {"key", "text", "ctc_logits"}
+        """
+        decoder_out, decoder_out_lens = self.ctc_decoder(encoder_out, encoder_out_lens)
+        ctc_logits = self.ctc.log_softmax(decoder_out)
+
+        b, n, d = encoder_out.size()
+        if isinstance(key[0], (list, tuple)):
+            key = key[0]
+        if len(key) < b:
+            key = key * b
+        ctc_results = []
+        for i in range(b):
+            x = ctc_logits[i, : encoder_out_lens[i].item(), :]
+            yseq = x.argmax(dim=-1)
+            yseq = torch.unique_consecutive(yseq, dim=-1)
+            mask = yseq != self.blank_id
+            token_int = yseq[mask].tolist()
+            # Change integer-ids to tokens
+            text = self.ctc_tokenizer.decode(token_int)
+            ctc_results.append({"key": key[i], "text": text, "ctc_logits": x})
+        return ctc_results
+
+    def ctc_confidence(self, ctc_logits, timestamps: list) -> float:
+        """由 CTC 对数概率与强制对齐得分估计整句置信度
+
+        取贪心路径逐帧后验的几何平均与对齐结果中最低的 token 得分两者中的较小值，
+        任一 token 不确定都会使整句置信度偏低。
+
+        Args:
+            ctc_logits: CTC 对数概率 [T, V]
+            timestamps: align_timestamps() 返回的 TokenTimestamps
+
+        Returns:
+            float: 0~1 之间的置信度
+        """
+        if ctc_logits.shape[0] == 0:
+            return 0.0
+        confidence = ctc_logits.max(dim=-1).values.float().mean().exp().item()
+        if len(timestamps) > 0:
+            confidence = min(confidence, timestamps.score.min().item())
+        return confidence
+
+    def align_timestamps(self, ctc_logits: list, texts: list, timestamp_format: str = None) -> list:
+        """用 CTC 强制对齐批量计算文本中每个 token 的时间戳（秒）
+
+        Args:
+            ctc_logits: 每条的 CTC 对数概率 [T_i, V]
+            texts: 每条待对齐的文本
+            timestamp_format: 为 "dict" 时返回 dict 列表，否则返回 TokenTimestamps
 
+        Returns:
+            list: 每条文本的时间戳
+        """
+        targets = [self.ctc_tokenizer.encode(text) for text in texts]
+        timestamps = forced_align_batch(ctc_logits, targets, blank=self.blank_id)
+        return [self.format_timestamps(t, timestamp_format) for t in timestamps]
+
+    def format_timestamps(self, timestamps, timestamp_format: str = None):
+        """设置时间单位（每帧 60ms）与 token 解码函数，按需转换为 dict 列表"""
+        timestamps.frame_shift = 6 * 10 / 1000
+        timestamps.decode = self.ctc_tokenizer.decode
+        if timestamp_format == "dict":
+            return timestamps.to_list()
+        return timestamps
+
+    def inference_ctc(
+        self,
+        data_in,
+        data_lengths=None,
+        key: list = None,
+        tokenizer=None,
+        frontend=None,
+        **kwargs,
+    ):
+        """仅用 CTC 分支识别，跳过 adaptor 与 LLM 解码
+
+        Returns:
+            tuple: (识别结果列表, 元数据)
+        """
+        if self.ctc_decoder is None:
+            raise ValueError("CTC mode requires a model with ctc_decoder")
+        contents, batch, meta_data = self.inference_encode(data_in, tokenizer, frontend, **kwargs)
+        ctc_results = self.ctc_decode(meta_data["encoder_out"], meta_data["encoder_out_lens"], key)
+
+        results = []
+        for ctc_result in ctc_results:
+            text = ctc_result["text"].replace("<|nospeech|>", "")
+            results.append({"key": ctc_result["key"], "text": text, "ctc_text": text})
+        if len(ctc_results) > 0 and kwargs.get("timestamps", "both") not in (None, "none"):
+            # CTC 模式下 text 与 ctc_text 相同，只对齐一次
+            self.add_timestamps(results, ctc_results, **{**kwargs, "timestamps": "ctc"})
+            for result in results:
+                result["timestamps"] = result["ctc_timestamps"]
         return results, meta_data
 
     @staticmethod
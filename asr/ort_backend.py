@@ -0,0 +1,131 @@
+"""Fun-ASR ONNX Runtime 音频编码后端
+
+CPU 上长音频的耗时主要在音频编码器。这里用 ONNX Runtime 运行 export.py 导出的
+编码器计算图，输出以编码结果 {"encoder_out": Tensor[T, D]} 的形式交给 FunASRNano。
+计算图带有 adaptor 时，编码结果同时包含 "adaptor_out"，FunASRNano 不再运行 adaptor；
+LLM 与 CTC 解码器仍由 PyTorch 运行。
+"""
+
+import logging
+import os
+
+import numpy as np
+import torch
+
+
+class OnnxAudioEncoder:
+    """ONNX Runtime 音频编码器
+
+    Attributes:
+        session: onnxruntime.InferenceSession
+        output_names: 计算图的输出名
+        with_adaptor: 计算图是否输出 adaptor_out
+    """
+
+    def __init__(self, model_path: str, num_threads: int = None):
+        """加载 ONNX 计算图
+
+        Args:
+            model_path: export.py 导出的 ONNX 文件
+            num_threads: 算子内并行线程数，默认为 CPU 核数
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 单条计算图顺序执行，线程全部用于算子内并行
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.output_names = [output.name for output in self.session.get_outputs()]
+        self.with_adaptor = "adaptor_out" in self.output_names
+        logging.info(
+            f"已加载 ONNX 音频编码器: {model_path}，线程数: {options.intra_op_num_threads}"
+        )
+
+    def __call__(self, speech: torch.Tensor, speech_lengths: torch.Tensor):
+        """运行编码器
+
+        Args:
+            speech: fbank 特征 [B, T, 560]
+            speech_lengths: 特征长度 [B]
+
+        Returns:
+            tuple: (encoder_out [B, T, D], encoder_out_lens [B])
+        """
+        encoder_out, encoder_out_lens = self.session.run(
+            ["encoder_out", "encoder_out_lens"],
+            {
+                "speech": speech.float().cpu().numpy(),
+                "speech_lengths": speech_lengths.long().cpu().numpy(),
+            },
+        )
+        return torch.from_numpy(encoder_out), torch.from_numpy(encoder_out_lens.astype(np.int64))
+
+    def encode_fbank(self, speech: torch.Tensor, speech_lengths: torch.Tensor) -> list:
+        """运行编码器（及 adaptor），按条返回编码结果
+
+        Args:
+            speech: fbank 特征 [B, T, 560]
+            speech_lengths: 特征长度 [B]
+
+        Returns:
+            list: 每条音频的编码结果 {"encoder_out": Tensor[T, D]}，
+                计算图带有 adaptor 时另含 "adaptor_out": Tensor[T', D']
+        """
+        names = ["encoder_out", "encoder_out_lens"]
+        if self.with_adaptor:
+            names += ["adaptor_out", "adaptor_out_lens"]
+        outputs = self.session.run(
+            names,
+            {
+                "speech": speech.float().cpu().numpy(),
+                "speech_lengths": speech_lengths.long().cpu().numpy(),
+            },
+        )
+        outputs = [torch.from_numpy(output) for output in outputs]
+        results = []
+        for i in range(outputs[0].shape[0]):
+            result = {"encoder_out": outputs[0][i, : outputs[1][i]]}
+            if self.with_adaptor:
+                result["adaptor_out"] = outputs[2][i, : outputs[3][i]]
+            results.append(result)
+        return results
+
+    def encode(self, audio_list: list, frontend=None, **kwargs) -> list:
+        """提取 fbank 并运行编码器（及 adaptor）
+
+        Args:
+            audio_list: 采样率为 frontend.fs 的一维音频张量列表
+            frontend: 前端处理器
+
+        Returns:
+            list: 每条音频的编码结果，见 encode_fbank()
+        """
+        from funasr.utils.load_utils import extract_fbank
+
+        speech, speech_lengths = extract_fbank(
+            audio_list, data_type="sound", frontend=frontend, is_final=True
+        )
+        return self.encode_fbank(speech, speech_lengths.view(-1))
+
+    def encode_audio(self, audio_list: list, frontend=None, **kwargs) -> list:
+        """提取 fbank 并运行编码器，与 FunASRNano.encode_audio 的输入输出一致
+
+        Args:
+            audio_list: 采样率为 frontend.fs 的一维音频张量列表
+            frontend: 前端处理器
+
+        Returns:
+            list: 每条音频的编码器输出，形状为 [T, D]
+        """
+        from funasr.utils.load_utils import extract_fbank
+
+        speech, speech_lengths = extract_fbank(
+            audio_list, data_type="sound", frontend=frontend, is_final=True
+        )
+        encoder_out, encoder_out_lens = self(speech, speech_lengths.view(-1))
+        return [encoder_out[i, : encoder_out_lens[i]] for i in range(encoder_out.shape[0])]
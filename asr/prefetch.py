@@ -0,0 +1,93 @@
+"""Fun-ASR 音频加载与特征提取预取
+
+批量转写目录时，音频解码与 fbank 提取原本在推理线程中同步执行
+（耗时记录在 meta_data["load_data"]、meta_data["extract_feat"]）。
+这里用线程池在后台处理后续文件，模型处理当前批次时下一批的特征已经就绪。
+
+未被取走的结果数有上限（背压），内存占用不随文件数增长；结果按输入顺序产出。
+音频解码（soundfile / ffmpeg）与 fbank 计算（torch 算子）都会释放 GIL，线程即可并行。
+"""
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+from funasr.utils.load_utils import extract_fbank
+
+
+def extract_features(waveform: torch.Tensor, frontend) -> dict:
+    """提取单条音频的 fbank 特征
+
+    Args:
+        waveform: 采样率为 frontend.fs 的一维音频张量
+        frontend: 前端处理器
+
+    Returns:
+        dict: {"fbank": Tensor[T, D]}，可直接作为 FunASRNano.inference 的输入
+    """
+    speech, speech_lengths = extract_fbank(
+        [waveform], data_type="sound", frontend=frontend, is_final=True
+    )
+    return {"fbank": speech[0, : int(speech_lengths.view(-1)[0])]}
+
+
+class Prefetcher:
+    """按输入顺序产出结果的有界后台预取
+
+    Attributes:
+        num_workers: 工作线程数
+        max_pending: 已提交但尚未被取走的最大任务数
+        stats: 统计信息，items 为已产出的结果数，wait 为消费方等待结果的总秒数
+    """
+
+    def __init__(self, fn, num_workers: int = 2, max_pending: int = 8):
+        """初始化
+
+        Args:
+            fn: 处理单个输入的函数，在工作线程中调用
+            num_workers: 工作线程数
+            max_pending: 已提交但尚未被取走的最大任务数，至少为 1
+        """
+        self.fn = fn
+        self.num_workers = num_workers
+        self.max_pending = max(1, max_pending)
+        self.stats = {"items": 0, "wait": 0.0}
+
+    def map(self, items):
+        """在后台处理 items，按顺序产出 fn(item)
+
+        任务的异常在产出对应结果时抛出；生成器提前关闭时取消未开始的任务，
+        等待进行中的任务结束后关闭线程池。
+
+        Args:
+            items: 输入的可迭代对象，按需读取
+
+        Yields:
+            fn(item) 的结果
+        """
+        items = iter(items)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            try:
+                for item in items:
+                    pending.append(executor.submit(self.fn, item))
+                    if len(pending) >= self.max_pending:
+                        break
+                while pending:
+                    begin = time.perf_counter()
+                    result = pending.popleft().result()
+                    self.stats["wait"] += time.perf_counter() - begin
+                    self.stats["items"] += 1
+                    # 取走一个结果后才提交下一个任务
+                    for item in items:
+                        pending.append(executor.submit(self.fn, item))
+                        break
+                    yield result
+            finally:
+                for future in pending:
+                    future.cancel()
+        logging.debug(
+            f"预取完成: {self.stats['items']} 条，消费方等待 {self.stats['wait']:.3f}s"
+        )
@@ -0,0 +1,66 @@
+"""Fun-ASR 提示词前缀 KV 缓存
+
+每次推理时 ChatML 系统提示词与 get_prompt() 生成的指令（热词列表往往很长）
+都位于 <|startofspeech|> 之前，内容只取决于 (系统提示词, 热词, 语言, itn)。
+这里把这段静态前缀的 past_key_values 按其 token 序列缓存起来，
+后续请求直接复用，LLM 只需预填充语音 token 及其后的文本。
+"""
+
+from .cache import LRUCache
+
+
+def to_legacy_cache(past_key_values) -> tuple:
+    """将 transformers 的 Cache 对象转换为 ((key, value), ...) 元组"""
+    if isinstance(past_key_values, (tuple, list)):
+        return tuple((k, v) for k, v in past_key_values)
+    if hasattr(past_key_values, "to_legacy_cache"):
+        return past_key_values.to_legacy_cache()
+    return tuple((layer.keys, layer.values) for layer in past_key_values.layers)
+
+
+def from_legacy_cache(legacy_cache: tuple, batch_size: int = 1):
+    """由 ((key, value), ...) 元组构造可供 generate 续写的 DynamicCache
+
+    Args:
+        legacy_cache: 每层的 (key, value)，batch 维为 1
+        batch_size: 展开后的 batch 大小
+
+    Returns:
+        DynamicCache: 新的缓存对象，generate 追加新 token 时不会修改缓存中的张量
+    """
+    from transformers import DynamicCache
+
+    layers = tuple(
+        (k.expand(batch_size, *k.shape[1:]), v.expand(batch_size, *v.shape[1:]))
+        for k, v in legacy_cache
+    )
+    if hasattr(DynamicCache, "from_legacy_cache"):
+        return DynamicCache.from_legacy_cache(layers)
+    return DynamicCache(layers)
+
+
+class PrefixKVCache(LRUCache):
+    """按内存上限做 LRU 淘汰的前缀 KV 缓存
+
+    缓存值为 ((key, value), ...) 元组，batch 维为 1。
+    """
+
+    def sizeof(self, value) -> int:
+        return sum(k.nbytes + v.nbytes for k, v in value)
+
+    def put(self, key, past_key_values) -> tuple:
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            past_key_values: LLM 前向输出的 past_key_values
+
+        Returns:
+            tuple: 写入的 ((key, value), ...) 元组
+        """
+        legacy_cache = tuple((k.detach(), v.detach()) for k, v in to_legacy_cache(past_key_values))
+        return super().put(key, legacy_cache)
+
+    def to_past_key_values(self, legacy_cache: tuple, batch_size: int = 1):
+        """构造可传给 generate 的 past_key_values"""
+        return from_legacy_cache(legacy_cache, batch_size=batch_size)
@@ -0,0 +1,110 @@
+"""Fun-ASR int8 动态量化
+
+CPU 推理时 LLM 的 Linear 层占绝大部分计算量。这里用 PyTorch 动态量化把
+Linear 权重转换为 int8（激活在运行时按 batch 动态量化），内存减半以上，
+在支持 VNNI / AVX512 的 CPU 上解码明显加速。可选同时量化 adaptor 与 CTC 解码器。
+
+量化后子模块的 state_dict 保存到磁盘。后续启动时不再转换：把每个 nn.Linear 换成空的
+动态量化 Linear 骨架，再以 weights_only=True 载入缓存的 int8 权重，
+缓存文件只含张量，读取时不会执行任意代码。
+"""
+
+import hashlib
+import logging
+import os
+
+import torch
+import torch.nn as nn
+import transformers
+
+# 可量化的 FunASRNano 子模块
+QUANTIZABLE_MODULES = ("llm", "audio_adaptor", "ctc_decoder")
+
+
+def _cache_path(cache_dir: str, cache_key: str, name: str) -> str:
+    version = f"torch={torch.__version__}|transformers={transformers.__version__}"
+    digest = hashlib.sha1(f"{cache_key}|{name}|{version}".encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{name}-int8-{digest[:16]}.pt")
+
+
+def _swap_linear(module: nn.Module, replaced: list) -> nn.Module:
+    """把 nn.Linear 原地替换为空的动态量化 Linear 骨架（与 quantize_dynamic 替换的层一致）
+
+    Args:
+        module: 要替换的模块
+        replaced: 记录 (父模块, 子模块名, 原 Linear)，载入失败时用于恢复
+
+    Returns:
+        nn.Module: 替换后的模块
+    """
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+
+    for name, child in module.named_children():
+        if type(child) is nn.Linear:
+            skeleton = DynamicLinear(
+                child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8
+            )
+            setattr(module, name, skeleton)
+            replaced.append((module, name, child))
+        else:
+            _swap_linear(child, replaced)
+    return module
+
+
+def _load_cached(module: nn.Module, path: str) -> bool:
+    """从缓存载入量化权重，失败时恢复原始 Linear 并返回 False"""
+    replaced = []
+    try:
+        state_dict = torch.load(path, map_location="cpu", weights_only=True)
+        _swap_linear(module, replaced).load_state_dict(state_dict)
+        return True
+    except Exception as e:
+        logging.warning(f"读取量化缓存失败: {path}, {e}")
+        for parent, name, child in replaced:
+            setattr(parent, name, child)
+        return False
+
+
+def quantize_int8(
+    model: nn.Module,
+    modules=("llm",),
+    cache_dir: str = None,
+    cache_key: str = "",
+) -> nn.Module:
+    """对 FunASRNano 的子模块做 int8 动态量化（原地替换）
+
+    Args:
+        model: FunASRNano 模型，需位于 CPU 上
+        modules: 要量化的子模块名，取值见 QUANTIZABLE_MODULES
+        cache_dir: 量化结果的磁盘缓存目录，None 表示不缓存
+        cache_key: 区分不同模型权重的缓存键（如模型名与版本）
+
+    Returns:
+        nn.Module: 量化后的模型
+    """
+    from torch.ao.quantization import quantize_dynamic
+
+    for name in modules:
+        if name not in QUANTIZABLE_MODULES:
+            raise ValueError(f"不支持量化的模块: {name}，可选: {QUANTIZABLE_MODULES}")
+        module = getattr(model, name, None)
+        if module is None:
+            continue
+
+        path = _cache_path(cache_dir, cache_key, name) if cache_dir is not None else None
+        module = module.float()
+        if path is not None and os.path.exists(path) and _load_cached(module, path):
+            logging.info(f"已加载量化缓存: {path}")
+            continue
+
+        quantize_dynamic(module, {nn.Linear}, dtype=torch.qint8, inplace=True)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            torch.save(module.state_dict(), tmp_path)
+            os.replace(tmp_path, path)
+            logging.info(f"量化结果已缓存到: {path}")
+
+    if "llm" in modules:
+        model.llm_dtype = "fp32"
+    return model
@@ -0,0 +1,229 @@
+"""Fun-ASR 识别结果持久化缓存
+
+同一批归档录音会在流水线重跑时被反复识别。这里把识别结果存入本地 SQLite，
+键由音频内容哈希、模型版本与解码参数（语言、热词、itn 等）共同决定，
+命中时直接返回保存的文本与时间戳，不经过模型。
+
+写入在后台线程中批量提交，不阻塞识别；超过保存期限或总大小上限时，
+按最久未访问的顺序淘汰。
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+def make_key(content_hash: str, model_revision: str, **options) -> str:
+    """由音频内容哈希、模型版本与解码参数生成缓存键
+
+    Args:
+        content_hash: 音频内容哈希，见 tools.utils.audio_content_hash
+        model_revision: 模型版本标识
+        **options: 影响识别结果的解码参数（language、hotwords、itn 等）
+
+    Returns:
+        str: 十六进制键
+    """
+    payload = json.dumps(
+        {"audio": content_hash, "model": model_revision, **options},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _to_json(value):
+    """把 numpy / torch 标量与数组转换为 JSON 可序列化的类型"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "to_list"):
+        return value.to_list()
+    raise TypeError(f"无法序列化的结果字段类型: {type(value).__name__}")
+
+
+class ResultCache:
+    """基于 SQLite 的识别结果缓存
+
+    Attributes:
+        path: 数据库文件路径
+        max_bytes: 结果总大小上限（字节）
+        max_age: 结果保存期限（秒），None 表示不过期
+        hits: 命中次数
+        misses: 未命中次数
+        writes: 已提交的写入次数
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        max_age: float = None,
+        flush_interval: float = 1.0,
+    ):
+        """打开（或创建）结果缓存
+
+        Args:
+            path: 数据库文件路径
+            max_bytes: 结果总大小上限（字节）
+            max_age: 结果保存期限（秒），None 表示不过期
+            flush_interval: 后台线程批量提交写入的最长间隔（秒）
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 已提交但尚未写入数据库的结果，查询时同样可以命中
+        self._pending = {}
+        self._conn = self._connect()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, nbytes INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self._conn.commit()
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="result-cache", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # WAL 模式下读取不会被后台写入阻塞
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, key: str):
+        """查询缓存，未命中或已过期时返回 None
+
+        Returns:
+            dict: 保存的识别结果
+        """
+        now = time.time()
+        with self._lock:
+            if key in self._pending:
+                self.hits += 1
+                return json.loads(self._pending[key])
+            row = self._conn.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.max_age is not None and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._queue.put(("touch", key, now))
+        return json.loads(row[0])
+
+    def put(self, key: str, value: dict):
+        """异步写入识别结果
+
+        Args:
+            key: 缓存键，见 make_key()
+            value: 识别结果，需可序列化为 JSON（numpy / torch 数值会被转换）
+        """
+        try:
+            text = json.dumps(value, ensure_ascii=False, default=_to_json)
+        except TypeError as e:
+            logging.warning(f"识别结果无法写入缓存: {e}")
+            return
+        with self._lock:
+            self._pending[key] = text
+        self._queue.put(("put", key, text))
+
+    def flush(self):
+        """等待已提交的写入全部完成"""
+        self._queue.join()
+
+    def close(self):
+        """完成剩余写入并关闭数据库"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._lock:
+            self._conn.close()
+        atexit.unregister(self.close)
+
+    def _write_loop(self):
+        """后台线程：批量提交写入与访问时间更新，每批提交后按需淘汰"""
+        conn = self._connect()
+        stop = False
+        while not stop:
+            ops = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while ops[-1] is not None:
+                try:
+                    ops.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                num_writes = 0
+                with conn:
+                    for op in ops:
+                        if op is None:
+                            stop = True
+                        elif op[0] == "put":
+                            _, key, text = op
+                            now = time.time()
+                            conn.execute(
+                                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                                (key, text, len(text.encode("utf-8")), now, now),
+                            )
+                            num_writes += 1
+                        else:
+                            _, key, accessed = op
+                            conn.execute(
+                                "UPDATE results SET accessed = ? WHERE key = ?", (accessed, key)
+                            )
+                    if num_writes > 0:
+                        self._evict(conn)
+                self.writes += num_writes
+            except sqlite3.Error as e:
+                logging.warning(f"写入识别结果缓存失败: {e}")
+            finally:
+                with self._lock:
+                    for op in ops:
+                        if op is not None and op[0] == "put" and self._pending.get(op[1]) is op[2]:
+                            del self._pending[op[1]]
+                for _ in ops:
+                    self._queue.task_done()
+        conn.close()
+
+    def _evict(self, conn: sqlite3.Connection):
+        """删除过期结果；总大小超过上限时删除最久未访问的结果"""
+        if self.max_age is not None:
+            conn.execute("DELETE FROM results WHERE created < ?", (time.time() - self.max_age,))
+        total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed, keys = 0, []
+        for key, nbytes in conn.execute("SELECT key, nbytes FROM results ORDER BY accessed"):
+            if total - freed <= self.max_bytes:
+                break
+            keys.append((key,))
+            freed += nbytes
+        conn.executemany("DELETE FROM results WHERE key = ?", keys)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}(path={self.path!r}, hits={self.hits}, "
+            f"misses={self.misses}, writes={self.writes})"
+        )
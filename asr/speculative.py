@@ -0,0 +1,171 @@
+"""Fun-ASR CTC 草稿推测解码
+
+CTC 分支的识别结果通常与 LLM 最终输出非常接近。这里把 CTC 文本用 LLM 分词器
+重新分词后作为草稿，LLM 一次前向并行校验一段草稿 token，接受与贪心解码一致的
+最长前缀，并在第一个不一致处补上 LLM 自己预测的 token。输出与贪心解码相同，
+但长语音上大部分 token 只需一次前向即可确认，解码步数显著减少。
+
+草稿与 LLM 输出不一致（标点、数字规整等）后，用已生成序列末尾的 n-gram 在草稿中
+重新定位，继续从匹配位置之后取草稿。
+"""
+
+import torch
+
+
+def eos_token_ids(llm) -> set:
+    """LLM 的结束 token 集合"""
+    eos_token_id = getattr(llm.generation_config, "eos_token_id", None)
+    if eos_token_id is None:
+        eos_token_id = llm.config.eos_token_id
+    if eos_token_id is None:
+        return set()
+    if isinstance(eos_token_id, int):
+        return {eos_token_id}
+    return set(eos_token_id)
+
+
+def _lookup_draft(generated: list, draft: list, pos: int, max_ngram: int = 3) -> int:
+    """用已生成序列末尾的 n-gram 在草稿中重新定位
+
+    Args:
+        generated: 已生成的 token
+        draft: 草稿 token
+        pos: 上一次草稿的位置，优先在其后查找
+        max_ngram: 最长匹配的 n-gram 长度
+
+    Returns:
+        int: 下一个草稿 token 的位置，找不到时返回 -1
+    """
+    for n in range(min(max_ngram, len(generated)), 0, -1):
+        ngram = generated[-n:]
+        starts = list(range(max(pos - n, 0), len(draft) - n + 1)) + list(range(0, max(pos - n, 0)))
+        for start in starts:
+            if draft[start : start + n] == ngram:
+                return start + n
+    return -1
+
+
+@torch.no_grad()
+def draft_generate(
+    llm,
+    inputs_embeds: torch.Tensor,
+    draft_ids: list,
+    max_new_tokens: int = 512,
+    num_draft_tokens: int = 16,
+    past_key_values=None,
+    stop_fn=None,
+    streamer=None,
+):
+    """以 CTC 结果为草稿的贪心推测解码（单条）
+
+    Args:
+        llm: 因果语言模型
+        inputs_embeds: 输入嵌入 [1, T, D]，不含 padding
+        draft_ids: 草稿 token（LLM 分词器编码）
+        max_new_tokens: 最大生成 token 数
+        num_draft_tokens: 每次前向最多校验的草稿 token 数
+        past_key_values: 已预填充的前缀 KV 缓存，其长度对应 inputs_embeds 的前缀
+        stop_fn: 可选的提前终止判断，参数为已生成的 token 列表，返回 True 时立即终止
+        streamer: 可选的 transformers 流式输出对象，每确认一批 token 调用一次 put()
+
+    Returns:
+        tuple: (生成的 token 列表（不含结束 token）, 统计信息 dict)，
+            统计信息中 eos 表示是否以结束 token 结束，stopped 表示是否被 stop_fn 终止
+    """
+    from transformers import DynamicCache
+
+    eos_ids = eos_token_ids(llm)
+    if past_key_values is None:
+        past_key_values = DynamicCache()
+    prefix_len = past_key_values.get_seq_length()
+
+    outputs = llm(
+        inputs_embeds=inputs_embeds[:, prefix_len:],
+        past_key_values=past_key_values,
+        use_cache=True,
+    )
+    past_key_values = outputs.past_key_values
+    next_token = outputs.logits[0, -1].argmax().item()
+
+    embed_tokens = llm.get_input_embeddings()
+    generated = []
+    pos = 0
+    stats = {"draft_tokens": 0, "accepted_tokens": 0, "decode_steps": 1, "stopped": False}
+    while True:
+        generated.append(next_token)
+        if streamer is not None:
+            streamer.put([next_token])
+        if next_token in eos_ids or len(generated) >= max_new_tokens:
+            break
+        if stop_fn is not None and stop_fn(generated):
+            stats["stopped"] = True
+            break
+
+        if pos >= 0 and pos < len(draft_ids) and generated[-1] == draft_ids[pos]:
+            pos += 1
+        else:
+            pos = _lookup_draft(generated, draft_ids, max(pos, 0))
+        candidates = []
+        if pos >= 0:
+            budget = min(num_draft_tokens, max_new_tokens - len(generated))
+            candidates = draft_ids[pos : pos + budget]
+
+        input_ids = torch.tensor(
+            [[next_token] + candidates], dtype=torch.long, device=inputs_embeds.device
+        )
+        outputs = llm(
+            inputs_embeds=embed_tokens(input_ids).to(inputs_embeds.dtype),
+            past_key_values=past_key_values,
+            use_cache=True,
+        )
+        past_key_values = outputs.past_key_values
+        preds = outputs.logits[0].argmax(dim=-1).tolist()
+        stats["decode_steps"] += 1
+        stats["draft_tokens"] += len(candidates)
+
+        num_accepted = 0
+        while num_accepted < len(candidates) and candidates[num_accepted] == preds[num_accepted]:
+            num_accepted += 1
+        stats["accepted_tokens"] += num_accepted
+        # 丢弃未被接受的草稿 token 的 KV
+        if num_accepted < len(candidates):
+            past_key_values.crop(num_accepted - len(candidates))
+
+        stop = False
+        num_generated = len(generated)
+        for token in candidates[:num_accepted]:
+            generated.append(token)
+            if token in eos_ids or len(generated) >= max_new_tokens:
+                stop = True
+                break
+        if streamer is not None and len(generated) > num_generated:
+            streamer.put(generated[num_generated:])
+        if stop:
+            break
+        pos += num_accepted
+        next_token = preds[num_accepted]
+
+    if streamer is not None:
+        streamer.end()
+    stats["eos"] = bool(generated) and generated[-1] in eos_ids
+    while generated and generated[-1] in eos_ids:
+        generated.pop()
+    stats["new_tokens"] = len(generated)
+    return generated, stats
+
+
+def summarize_stats(stats_list: list) -> dict:
+    """汇总推测解码统计信息
+
+    Returns:
+        dict: 草稿接受率 acceptance_rate，以及每次前向平均确认的 token 数 speedup
+            （相对逐 token 自回归解码的解码步数缩减倍数）
+    """
+    total = {"draft_tokens": 0, "accepted_tokens": 0, "decode_steps": 0, "new_tokens": 0}
+    for stats in stats_list:
+        for k in total:
+            total[k] += stats[k]
+    total["acceptance_rate"] = total["accepted_tokens"] / max(total["draft_tokens"], 1)
+    # 自回归解码每个 token（含结束 token）需要一次前向
+    total["speedup"] = (total["new_tokens"] + len(stats_list)) / max(total["decode_steps"], 1)
+    return total
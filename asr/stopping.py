@@ -0,0 +1,119 @@
+"""Fun-ASR LLM 生成提前终止
+
+语音识别的输出长度大致与音频时长成正比，这里按时长给每条语音设置生成 token 上限，
+并检测噪声音频上常见的重复循环（同一 n-gram 连续重复），一旦出现立即终止该条生成，
+由调用方改用 CTC 结果。按时长的上限需显式指定 tokens_per_second 才启用。
+"""
+
+import math
+
+import torch
+from transformers import StoppingCriteria
+
+
+def token_budget(
+    durations: list,
+    max_length: int = 512,
+    tokens_per_second: float = 15.0,
+    min_tokens: int = 16,
+) -> list:
+    """按音频时长计算每条语音的生成 token 上限
+
+    Args:
+        durations: 每条语音的时长（秒）
+        max_length: 全局最大生成 token 数
+        tokens_per_second: 每秒语音允许生成的 token 数
+        min_tokens: 与时长无关的基础 token 数（标点、结束 token 等）
+
+    Returns:
+        list: 每条语音的 token 上限
+    """
+    return [
+        min(max_length, min_tokens + math.ceil(duration * tokens_per_second))
+        for duration in durations
+    ]
+
+
+def has_repetition(tokens: list, max_ngram: int = 8, min_span: int = 16, min_repeats: int = 3) -> bool:
+    """序列末尾是否为同一 n-gram 的连续重复
+
+    n-gram 需连续重复至少 min_repeats 次，且重复部分总长不少于 min_span 个 token，
+    避免把 "哈哈哈"、"谢谢谢谢" 之类的正常叠词判为循环。
+
+    Args:
+        tokens: 已生成的 token
+        max_ngram: 检测的最长 n-gram
+        min_span: 重复部分的最少 token 数
+        min_repeats: 最少重复次数
+
+    Returns:
+        bool: 是否陷入重复循环
+    """
+    for n in range(1, max_ngram + 1):
+        repeats = max(min_repeats, -(-min_span // n))
+        span = n * repeats
+        if len(tokens) < span:
+            continue
+        tail = tokens[-span:]
+        if tail == tail[:n] * repeats:
+            return True
+    return False
+
+
+def repetition_window(max_ngram: int = 8, min_span: int = 16, min_repeats: int = 3) -> int:
+    """has_repetition() 需要检查的末尾 token 数"""
+    return max(n * max(min_repeats, -(-min_span // n)) for n in range(1, max_ngram + 1))
+
+
+class EarlyStopping(StoppingCriteria):
+    """按时长的 token 上限与重复循环检测，逐条终止生成
+
+    Attributes:
+        budgets: 每条语音的 token 上限
+        reasons: 每条语音的提前终止原因，"repetition"、"budget" 或 None
+    """
+
+    def __init__(
+        self,
+        budgets: list,
+        eos_token_ids: set,
+        max_length: int = None,
+        max_ngram: int = 8,
+        min_span: int = 16,
+    ):
+        """初始化
+
+        Args:
+            budgets: 每条语音的 token 上限
+            eos_token_ids: 结束 token 集合，已生成结束 token 的条目不再检测
+            max_length: 全局最大生成 token 数，上限不小于它的条目到达上限时
+                属于正常截断，不记为 "budget"
+            max_ngram: 检测的最长 n-gram
+            min_span: 重复部分的最少 token 数
+        """
+        self.budgets = budgets
+        self.eos_token_ids = eos_token_ids
+        self.max_length = max_length
+        self.max_ngram = max_ngram
+        self.min_span = min_span
+        self.window = repetition_window(max_ngram, min_span)
+        self.reasons = [None] * len(budgets)
+        self.finished = [False] * len(budgets)
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        # 只传入 inputs_embeds 时 input_ids 只包含新生成的 token
+        num_new = input_ids.shape[1]
+        is_done = [False] * input_ids.shape[0]
+        for i, tail in enumerate(input_ids[:, -self.window :].tolist()):
+            if not self.finished[i]:
+                if tail[-1] in self.eos_token_ids:
+                    self.finished[i] = True
+                elif has_repetition(tail, self.max_ngram, self.min_span):
+                    self.reasons[i] = "repetition"
+                    self.finished[i] = True
+                elif num_new >= self.budgets[i]:
+                    if self.max_length is None or self.budgets[i] < self.max_length:
+                        self.reasons[i] = "budget"
+                    self.finished[i] = True
+            is_done[i] = self.finished[i]
+        return torch.tensor(is_done, dtype=torch.bool, device=input_ids.device)
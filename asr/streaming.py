@@ -0,0 +1,268 @@
+"""Fun-ASR 增量流式识别
+
+流式会话只对新到达的音频块（附带一小段左侧上下文）提取特征并编码，
+编码器输出按块缓存；LLM 只在有限时长的活动窗口上解码。窗口超长时，
+按 CTC 强制对齐的时间戳确认（commit）窗口前部的文本并丢弃对应的编码器输出，
+因此每个音频块的计算量与已处理的音频总时长无关。
+
+除了按块送入 16kHz 波形（accept_waveform），会话也支持推送式接口：
+feed() 接收麦克风、电话或网络传来的任意采样率 PCM 数据，返回中间结果；
+flush() 结束当前语句并返回最终结果。
+"""
+
+import time
+from typing import List, Optional
+
+import torch
+
+from .tools.utils import StreamingResampler, pcm_to_tensor
+
+# 编码器每帧对应的时长（秒）：fbank 帧移 10ms × LFR 6
+FRAME_SHIFT = 0.06
+
+
+class StreamingSession:
+    """增量流式识别会话
+
+    Attributes:
+        committed_text: 已确认、后续不会再改变的文本
+        window_text: 活动窗口的当前识别假设
+    """
+
+    sample_rate = 16000
+
+    def __init__(
+        self,
+        model,
+        kwargs: dict,
+        language: str = "中文",
+        hotwords: Optional[List[str]] = None,
+        itn: bool = True,
+        chunk_size: float = 0.72,
+        lookback: float = 1.44,
+        max_window: float = 12.0,
+        rollback_tokens: int = 5,
+        input_rate: int = 16000,
+        channels: int = 1,
+        mode: str = "llm",
+        encoder=None,
+    ):
+        """初始化流式会话
+
+        Args:
+            model: FunASRNano 模型
+            kwargs: 模型推理参数（tokenizer、frontend、device 等）
+            language: 目标语言
+            hotwords: 热词列表
+            itn: 是否进行文本规整
+            chunk_size: 每次编码的音频块时长（秒），按 60ms 编码器帧对齐
+            lookback: 编码新音频块时附带的左侧上下文时长（秒）
+            max_window: LLM 解码窗口的最大时长（秒），超出后确认窗口前半部分的文本
+            rollback_tokens: 中间结果末尾回退的 token 数，回退部分在下一块重新解码
+            input_rate: feed() 输入音频的采样率
+            channels: feed() 输入音频的声道数
+            mode: 解码方式，"llm" 或 "ctc"
+            encoder: 音频编码器，需提供与 FunASRNano.encode_audio 相同的接口
+                （如 ort_backend.OnnxAudioEncoder），默认使用 model 自身的编码器；
+                编码器输出按块拼接，adaptor 始终由 model 在整个窗口上运行
+        """
+        self.model = model
+        self.encoder = encoder if encoder is not None else model
+        self.kwargs = kwargs
+        self.tokenizer = kwargs.get("tokenizer", None)
+        self.frontend = kwargs.get("frontend", None)
+        self.language = language
+        self.hotwords = hotwords if hotwords is not None else []
+        self.itn = itn
+        self.rollback_tokens = rollback_tokens
+        self.input_rate = input_rate
+        self.resampler = None
+        if input_rate != self.sample_rate:
+            self.resampler = StreamingResampler(input_rate, self.sample_rate)
+        self.channels = channels
+        self.mode = mode
+
+        self.samples_per_frame = int(FRAME_SHIFT * self.sample_rate)
+        self.chunk_samples = max(1, round(chunk_size / FRAME_SHIFT)) * self.samples_per_frame
+        self.lookback_samples = round(lookback / FRAME_SHIFT) * self.samples_per_frame
+        self.max_window_frames = max(1, round(max_window / FRAME_SHIFT))
+        self.reset()
+
+    def reset(self):
+        """清空会话状态"""
+        self.pending = torch.zeros(0)  # 尚未编码的音频
+        self.context = torch.zeros(0)  # 已编码音频的尾部，作为下一块的左侧上下文
+        self.blocks = []  # 活动窗口内各音频块的编码器输出
+        self.committed_text = ""
+        self.window_text = ""
+        self.prev_text = ""
+        self.num_samples = 0
+        if getattr(self, "resampler", None) is not None:
+            self.resampler.reset()
+
+    @property
+    def text(self) -> str:
+        """当前完整识别文本"""
+        return self.committed_text + self.window_text
+
+    @property
+    def window_frames(self) -> int:
+        return sum(block.shape[0] for block in self.blocks)
+
+    def accept_waveform(self, samples: torch.Tensor, is_final: bool = False) -> Optional[str]:
+        """送入新音频
+
+        Args:
+            samples: 16kHz 单声道 float32 音频
+            is_final: 是否为最后一段音频
+
+        Returns:
+            稳定的中间结果（最后一段时为完整结果）；没有新的音频块可解码时返回 None
+        """
+        samples = samples.reshape(-1).float().cpu()
+        self.num_samples += samples.numel()
+        self.pending = torch.cat([self.pending, samples])
+
+        updated = False
+        while self.pending.numel() >= self.chunk_samples:
+            self._encode_block(self.pending[: self.chunk_samples])
+            self.pending = self.pending[self.chunk_samples :]
+            updated = True
+            if self.window_frames > self.max_window_frames:
+                self._decode()
+                self._commit()
+        if is_final and self.pending.numel() > 0:
+            self._encode_block(self.pending)
+            self.pending = torch.zeros(0)
+            updated = True
+
+        if not updated and not is_final:
+            return None
+        if self.blocks:
+            self._decode()
+
+        if is_final:
+            self.committed_text += self.window_text
+            self.window_text = ""
+            self.prev_text = ""
+            self.blocks = []
+            return self.committed_text
+
+        self.prev_text = self._rollback(self.window_text)
+        return self.committed_text + self.prev_text
+
+    def feed(self, pcm) -> Optional[dict]:
+        """推送一段实时音频
+
+        Args:
+            pcm: 16-bit PCM 字节串，或 numpy 数组 / torch 张量（整数 PCM 或 [-1, 1] 浮点），
+                采样率与声道数由 input_rate、channels 指定
+
+        Returns:
+            中间结果；尚未凑满一个音频块时返回 None
+        """
+        begin = time.perf_counter()
+        text = self.accept_waveform(self._to_waveform(pcm))
+        if text is None:
+            return None
+        return self._make_result(text, is_final=False, begin=begin)
+
+    def flush(self) -> dict:
+        """结束当前语句，返回最终结果并重置会话"""
+        begin = time.perf_counter()
+        tail = torch.zeros(0)
+        if self.resampler is not None:
+            # 取出重采样器中剩余的采样
+            tail = self.resampler(tail, is_final=True)
+        text = self.accept_waveform(tail, is_final=True)
+        result = self._make_result(text, is_final=True, begin=begin)
+        self.reset()
+        return result
+
+    def _to_waveform(self, pcm) -> torch.Tensor:
+        samples = pcm_to_tensor(pcm, channels=self.channels)
+        if self.resampler is not None:
+            samples = self.resampler(samples)
+        return samples
+
+    def _make_result(self, text: str, is_final: bool, begin: float) -> dict:
+        return {
+            "text": text,
+            "committed_text": self.committed_text,
+            "is_final": is_final,
+            "audio_duration": self.num_samples / self.sample_rate,
+            "latency": time.perf_counter() - begin,
+        }
+
+    def _encode_block(self, chunk: torch.Tensor):
+        """编码一个音频块，只保留新音频对应的编码器帧"""
+        audio = torch.cat([self.context, chunk])
+        if audio.numel() < self.frontend.fs * 0.025:  # 不足一个 fbank 窗
+            return
+        with torch.no_grad():
+            encoder_out = self.encoder.encode_audio([audio], **self.kwargs)[0]
+        skip = self.context.numel() // self.samples_per_frame
+        if encoder_out.shape[0] > skip:
+            self.blocks.append(encoder_out[skip:])
+        if self.lookback_samples > 0:
+            self.context = audio[-self.lookback_samples :]
+
+    def _decode(self):
+        """在活动窗口上解码"""
+        encoder_out = torch.cat(self.blocks)
+        infer_kwargs = {
+            **self.kwargs,
+            "prev_text": self.prev_text,
+            "hotwords": self.hotwords,
+            "language": self.language,
+            "itn": self.itn,
+            "mode": self.mode,
+            # 确认文本时需要 LLM 文本的时间戳
+            "timestamps": "llm",
+            "timestamp_format": None,
+        }
+        with torch.no_grad():
+            results, _ = self.model.inference([{"encoder_out": encoder_out}], **infer_kwargs)
+        self._result = results[0]
+        self.window_text = self._result["text"]
+
+    def _commit(self):
+        """确认窗口前半部分的文本并丢弃对应的编码器输出"""
+        keep_frames = self.max_window_frames // 2
+        window_frames = self.window_frames
+        drop_blocks, drop_frames = 0, 0
+        for block in self.blocks:
+            if window_frames - drop_frames - block.shape[0] < keep_frames:
+                break
+            drop_frames += block.shape[0]
+            drop_blocks += 1
+        if drop_blocks == 0:
+            return
+
+        timestamps = self._result.get("timestamps", [])
+        ctc_tokenizer = getattr(self.model, "ctc_tokenizer", None)
+        token_ids = ctc_tokenizer.encode(self.window_text) if ctc_tokenizer is not None else []
+        if timestamps and len(token_ids) == len(timestamps):
+            # 时间戳按帧递增，结束帧不超过切分点的 token 构成确认前缀
+            num_commit = int((timestamps.end <= drop_frames).sum())
+            committed = ctc_tokenizer.decode(token_ids[:num_commit])
+            if self.window_text.startswith(committed):
+                rest = self.window_text[len(committed) :]
+            else:
+                rest = ctc_tokenizer.decode(token_ids[num_commit:])
+        else:
+            # 对齐失败时确认整个窗口，保证每块的计算量有界
+            committed, rest = self.window_text, ""
+            drop_blocks = len(self.blocks)
+
+        self.committed_text += committed
+        self.window_text = rest
+        self.prev_text = self._rollback(rest)
+        self.blocks = self.blocks[drop_blocks:]
+
+    def _rollback(self, text: str) -> str:
+        """去掉末尾若干 token，作为下一次解码的 assistant 前缀"""
+        if not text or self.tokenizer is None or self.rollback_tokens <= 0:
+            return text
+        token_ids = self.tokenizer.encode(text)[: -self.rollback_tokens]
+        return self.tokenizer.decode(token_ids).replace("\ufffd", "")
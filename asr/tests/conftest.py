@@ -0,0 +1,83 @@
+"""asr 测试公共部分：随机初始化的小尺寸 FunASRNano"""
+
+import sys
+import os
+
+import pytest
+import torch
+
+# 添加 asr 目录到路径（model.py 按模块名导入同目录文件）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 添加仓库根目录到路径（prefix_cache.py 等使用相对导入，需按 asr 包导入）
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from transformers import Qwen2Config
+from funasr.frontends.wav_frontend import WavFrontend
+
+from model import FunASRNano
+
+
+class ByteTokenizer:
+    """按 UTF-8 字节编码的最小分词器"""
+
+    def encode(self, text, **kwargs):
+        return list(text.encode("utf-8"))
+
+    def decode(self, ids, **kwargs):
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        return bytes([i for i in ids if i < 256]).decode("utf-8", errors="replace")
+
+    def batch_decode(self, sequences, **kwargs):
+        return [self.decode(ids) for ids in sequences]
+
+
+def _build_model(config_dir: str, llm_dtype: str = "fp32"):
+    """构建小尺寸 FunASRNano，返回 (模型, 推理参数)"""
+    torch.manual_seed(0)
+    tokenizer = ByteTokenizer()
+    model = FunASRNano(
+        audio_encoder="SenseVoiceEncoderSmall",
+        audio_encoder_conf=dict(
+            output_size=32, attention_heads=2, linear_units=64, num_blocks=1, tp_blocks=1
+        ),
+        audio_adaptor="Transformer",
+        audio_adaptor_conf=dict(downsample_rate=1, ffn_dim=64, n_layer=1, attention_heads=2),
+        llm="Qwen",
+        llm_conf=dict(init_param_path=config_dir, llm_dtype=llm_dtype),
+        input_size=560,
+        ctc_decoder="Transformer",
+        ctc_decoder_conf=dict(
+            downsample_rate=1, ffn_dim=64, llm_dim=32, n_layer=1, attention_heads=2
+        ),
+        ctc_tokenizer=tokenizer,
+        ctc_tokenizer_conf=None,
+        ctc_vocab_size=300,
+    ).eval()
+    frontend = WavFrontend(
+        cmvn_file=None, n_mels=80, frame_length=25, frame_shift=10, lfr_m=7, lfr_n=6, dither=0.0
+    )
+    return model, dict(tokenizer=tokenizer, frontend=frontend, device="cpu", max_length=8)
+
+
+@pytest.fixture(scope="module")
+def config_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("qwen_tiny")
+    Qwen2Config(
+        vocab_size=300,
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=4096,
+        eos_token_id=10,
+        tie_word_embeddings=False,
+    ).save_pretrained(path)
+    return str(path)
+
+
+@pytest.fixture
+def build_model(config_dir):
+    """构建小尺寸 FunASRNano 的工厂函数，参数为 llm_dtype"""
+    return lambda llm_dtype="fp32": _build_model(config_dir, llm_dtype)
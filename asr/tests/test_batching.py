@@ -0,0 +1,25 @@
+"""批量解码测试
+
+验证不同长度的语音左填充后一起解码，结果与逐条解码完全一致。
+
+用法:
+    python -m pytest asr/tests/test_batching.py
+"""
+
+import torch
+
+
+def test_batch_matches_single(build_model):
+    model, kwargs = build_model()
+    kwargs = {**kwargs, "max_length": 40}
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(9600) * 0.1, torch.randn(4000) * 0.1]
+    keys = ["a", "b", "c"]
+
+    with torch.no_grad():
+        expected = [
+            model.inference([waveform], key=[key], **kwargs)[0][0]["text"]
+            for waveform, key in zip(waveforms, keys)
+        ]
+        actual, _ = model.inference(waveforms, key=keys, batch_size=3, **kwargs)
+    assert [r["text"] for r in actual] == expected
@@ -0,0 +1,57 @@
+"""ONNX Runtime 编码器后端测试
+
+导出小模型的编码器与 adaptor，验证 ONNX Runtime 的输出与 PyTorch 一致，
+并且带 adaptor_out 的编码结果与原始音频的识别结果相同。需要安装 onnx 与 onnxruntime。
+
+用法:
+    python -m pytest asr/tests/test_ort_backend.py
+"""
+
+import pytest
+import torch
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from export import export_audio_encoder
+from ort_backend import OnnxAudioEncoder
+
+
+@pytest.fixture
+def ort_model(build_model, tmp_path):
+    model, kwargs = build_model()
+    path = export_audio_encoder(
+        model, str(tmp_path / "encoder.onnx"), with_adaptor=True, with_ctc=False
+    )
+    return model, kwargs, OnnxAudioEncoder(path, num_threads=1)
+
+
+def test_outputs_match_torch(ort_model):
+    model, kwargs, encoder = ort_model
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(9600) * 0.1]
+
+    encoded = encoder.encode(waveforms, **kwargs)
+    assert encoder.with_adaptor
+    with torch.no_grad():
+        for waveform, item in zip(waveforms, encoded):
+            encoder_out = model.encode_audio([waveform], **kwargs)[0]
+            adaptor_out, _ = model.audio_adaptor(
+                encoder_out[None], torch.tensor([encoder_out.shape[0]])
+            )
+            torch.testing.assert_close(item["encoder_out"], encoder_out, rtol=1e-4, atol=1e-4)
+            torch.testing.assert_close(item["adaptor_out"], adaptor_out[0], rtol=1e-4, atol=1e-4)
+
+
+def test_inference_with_adaptor_out(ort_model):
+    model, kwargs, encoder = ort_model
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(9600) * 0.1]
+    keys = ["a", "b"]
+
+    with torch.no_grad():
+        expected, _ = model.inference(waveforms, key=keys, batch_size=2, **kwargs)
+        actual, _ = model.inference(
+            encoder.encode(waveforms, **kwargs), key=keys, batch_size=2, **kwargs
+        )
+    assert [r["text"] for r in actual] == [r["text"] for r in expected]
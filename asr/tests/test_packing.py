@@ -0,0 +1,81 @@
+"""多条短语音打包解码测试
+
+验证打包后第二轮的上下文与 ChatML 多轮对话的 token 序列一致：第一轮完整提示词、
+第一轮输出、"<|im_end|>" 与换行，再接去掉系统提示词的第二轮提示词。
+
+用法:
+    python -m pytest asr/tests/test_packing.py
+"""
+
+import pytest
+import torch
+
+import model as model_module
+
+SYSTEM_PREFIX = "<|im_start|>system\nYou are a helpful assistant.<|im_end|>\n"
+
+
+def embeds_to_ids(model, embeds):
+    """按嵌入表逐位置还原 token，语音位置记为 -1"""
+    weight = model.llm.get_input_embeddings().weight
+    ids = []
+    for vector in embeds[0]:
+        match = (weight == vector).all(dim=-1).nonzero()
+        ids.append(match[0, 0].item() if len(match) > 0 else -1)
+    return ids
+
+
+@pytest.fixture
+def traced(build_model, monkeypatch):
+    """记录每轮 draft_generate 的上下文 token 与生成结果"""
+    model, kwargs = build_model()
+    turns = []
+    original = model_module.draft_generate
+
+    def tracing_draft_generate(llm, inputs_embeds, *args, **kw):
+        ids, stats = original(llm, inputs_embeds, *args, **kw)
+        turns.append((embeds_to_ids(model, inputs_embeds), ids))
+        return ids, stats
+
+    monkeypatch.setattr(model_module, "draft_generate", tracing_draft_generate)
+    return model, kwargs, turns
+
+
+def transcribe(model, kwargs, **options):
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(9600) * 0.1]
+    with torch.no_grad():
+        return model.inference(
+            waveforms, key=["a", "b"], batch_size=2, packing=True, **{**kwargs, **options}
+        )
+
+
+def test_packed_prompt_tokens(traced):
+    model, kwargs, turns = traced
+    tokenizer = kwargs["tokenizer"]
+
+    # 上下文上限过小时每条单独成包，得到各自的完整提示词
+    results, _ = transcribe(model, kwargs, max_token_length=1)
+    assert [r["pack"] for r in results] == [0, 1]
+    (prompt_a, output_a), (prompt_b, _) = turns
+    assert prompt_b[: len(tokenizer.encode(SYSTEM_PREFIX))] == tokenizer.encode(SYSTEM_PREFIX)
+
+    turns.clear()
+    results, _ = transcribe(model, kwargs)
+    assert [r["pack"] for r in results] == [0, 0]
+    assert turns[0][0] == prompt_a
+    assert turns[1][0] == (
+        prompt_a
+        + output_a
+        + [model.llm.config.eos_token_id]
+        + tokenizer.encode("\n")
+        + prompt_b[len(tokenizer.encode(SYSTEM_PREFIX)) :]
+    )
+
+
+def test_packed_speculative_matches_greedy(build_model):
+    model, kwargs = build_model()
+    expected, _ = transcribe(model, kwargs, max_length=40)
+    actual, _ = transcribe(model, kwargs, max_length=40, speculative=True)
+    assert [r["pack"] for r in actual] == [0, 0]
+    assert [r["text"] for r in actual] == [r["text"] for r in expected]
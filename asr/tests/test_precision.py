@@ -0,0 +1,47 @@
+"""LLM 精度配置测试
+
+用随机初始化的小模型验证：精度在加载时固定，推理请求不会转换或替换 LLM 权重，
+与加载时精度不一致的请求会被拒绝。
+
+用法:
+    python -m pytest asr/tests/test_precision.py
+"""
+
+import pytest
+import torch
+
+
+def llm_snapshot(model):
+    """LLM 每个参数的存储地址与精度"""
+    return {
+        name: (param.data_ptr(), param.dtype) for name, param in model.llm.named_parameters()
+    }
+
+
+@pytest.mark.parametrize("llm_dtype", ["fp32", "bf16_autocast"])
+def test_inference_keeps_llm_weights(build_model, llm_dtype):
+    model, kwargs = build_model(llm_dtype)
+    llm = model.llm
+    snapshot = llm_snapshot(model)
+    waveform = torch.randn(16000) * 0.1
+
+    for _ in range(2):
+        results, _ = model.inference([waveform], key=["a"], **kwargs)
+        assert results[0]["decoder"] == "llm"
+        assert model.llm is llm
+        assert llm_snapshot(model) == snapshot
+
+    # 与加载时一致的请求精度同样不会转换权重
+    model.inference([waveform], key=["a"], llm_dtype=llm_dtype, **kwargs)
+    assert llm_snapshot(model) == snapshot
+
+
+@pytest.mark.parametrize("request_kwargs", [{"llm_dtype": "fp16"}, {"fp16": True}])
+def test_mismatched_llm_dtype_raises(build_model, request_kwargs):
+    model, kwargs = build_model("fp32")
+    snapshot = llm_snapshot(model)
+    waveform = torch.randn(16000) * 0.1
+
+    with pytest.raises(ValueError):
+        model.inference([waveform], key=["a"], **request_kwargs, **kwargs)
+    assert llm_snapshot(model) == snapshot
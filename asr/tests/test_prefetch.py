@@ -0,0 +1,32 @@
+"""后台预取测试
+
+验证结果按输入顺序产出，生成器提前关闭时取消未开始的任务并关闭线程池。
+
+用法:
+    python -m pytest asr/tests/test_prefetch.py
+"""
+
+import threading
+
+from prefetch import Prefetcher
+
+
+def worker_threads():
+    return [thread for thread in threading.enumerate() if "ThreadPoolExecutor" in thread.name]
+
+
+def test_results_in_order():
+    prefetcher = Prefetcher(lambda x: x * 2, num_workers=2, max_pending=3)
+    assert list(prefetcher.map(range(10))) == [x * 2 for x in range(10)]
+    assert prefetcher.stats["items"] == 10
+
+
+def test_close_cancels_and_shuts_down():
+    calls = []
+    prefetcher = Prefetcher(calls.append, num_workers=1, max_pending=2)
+    features = prefetcher.map(range(100))
+    next(features)
+    features.close()
+
+    assert len(calls) <= 3
+    assert worker_threads() == []
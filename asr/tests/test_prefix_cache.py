@@ -0,0 +1,36 @@
+"""提示词前缀 KV 缓存测试
+
+验证首次计算（未命中）与复用缓存（命中）时的识别结果都与不使用缓存时完全一致，
+普通生成与推测解码两条路径均覆盖。
+
+用法:
+    python -m pytest asr/tests/test_prefix_cache.py
+"""
+
+import pytest
+import torch
+
+from asr.prefix_cache import PrefixKVCache
+
+
+def transcribe(model, kwargs, **options):
+    # 等长语音，批次内没有左填充，前缀缓存才会生效
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(16000) * 0.1]
+    with torch.no_grad():
+        results, _ = model.inference(
+            waveforms, key=["a", "b"], batch_size=2, **{**kwargs, "max_length": 40, **options}
+        )
+    return [r["text"] for r in results]
+
+
+@pytest.mark.parametrize("speculative", [False, True])
+def test_prefix_cache_matches_plain(build_model, speculative):
+    model, kwargs = build_model()
+    expected = transcribe(model, kwargs)
+    prefix_cache = PrefixKVCache()
+
+    assert transcribe(model, kwargs, prefix_cache=prefix_cache, speculative=speculative) == expected
+    assert prefix_cache.misses == 1
+    assert transcribe(model, kwargs, prefix_cache=prefix_cache, speculative=speculative) == expected
+    assert prefix_cache.hits > 0
@@ -0,0 +1,60 @@
+"""int8 动态量化缓存测试
+
+验证量化缓存命中时不再调用 quantize_dynamic，且与首次量化的输出完全一致；
+缓存文件损坏时回退到重新量化。
+
+用法:
+    python -m pytest asr/tests/test_quantize.py
+"""
+
+import torch
+import torch.ao.quantization
+
+from quantize import quantize_int8
+
+MODULES = ("llm", "audio_adaptor", "ctc_decoder")
+
+
+def run_quantized(model):
+    """LLM 与 adaptor 在固定输入上的输出"""
+    torch.manual_seed(0)
+    input_ids = torch.randint(0, 256, (1, 12))
+    encoder_out = torch.randn(1, 20, 32)
+    with torch.no_grad():
+        logits = model.llm(input_ids=input_ids).logits
+        adaptor_out, _ = model.audio_adaptor(encoder_out, torch.tensor([20]))
+    return logits, adaptor_out
+
+
+def test_cache_hit_skips_conversion(build_model, tmp_path, monkeypatch):
+    first, _ = build_model()
+    quantize_int8(first, modules=MODULES, cache_dir=str(tmp_path), cache_key="tiny")
+    assert len(list(tmp_path.glob("*.pt"))) == len(MODULES)
+
+    calls = []
+    original = torch.ao.quantization.quantize_dynamic
+
+    def counting_quantize_dynamic(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(torch.ao.quantization, "quantize_dynamic", counting_quantize_dynamic)
+    second, _ = build_model()
+    quantize_int8(second, modules=MODULES, cache_dir=str(tmp_path), cache_key="tiny")
+    assert calls == []
+
+    for expected, actual in zip(run_quantized(first), run_quantized(second)):
+        assert torch.equal(expected, actual)
+
+
+def test_corrupt_cache_requantizes(build_model, tmp_path):
+    reference, _ = build_model()
+    quantize_int8(reference, modules=("llm",), cache_dir=str(tmp_path), cache_key="tiny")
+    (path,) = tmp_path.glob("*.pt")
+    path.write_bytes(b"corrupt")
+
+    model, _ = build_model()
+    quantize_int8(model, modules=("llm",), cache_dir=str(tmp_path), cache_key="tiny")
+    assert torch.equal(run_quantized(reference)[0], run_quantized(model)[0])
+    # 重新量化后缓存被重写，可以再次命中
+    assert torch.load(path, weights_only=True)
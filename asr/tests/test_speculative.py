@@ -0,0 +1,53 @@
+"""CTC 草稿推测解码测试
+
+验证推测解码与贪心解码的输出完全一致：草稿完全正确时解码步数减少，
+草稿错误时逐步回退；以及批量识别中推测解码的结果与普通生成相同。
+
+用法:
+    python -m pytest asr/tests/test_speculative.py
+"""
+
+import pytest
+import torch
+
+from speculative import draft_generate
+
+
+@pytest.fixture
+def prompt(build_model):
+    model, kwargs = build_model()
+    torch.manual_seed(0)
+    return model, torch.randn(1, 12, model.llm.config.hidden_size)
+
+
+@pytest.mark.parametrize("draft", ["greedy", "wrong", "empty"])
+def test_draft_generate_matches_greedy(prompt, draft):
+    model, inputs_embeds = prompt
+    expected, greedy_stats = draft_generate(model.llm, inputs_embeds, [], max_new_tokens=40)
+    draft_ids = {
+        "greedy": expected,
+        "wrong": [(token + 1) % 256 for token in expected],
+        "empty": [],
+    }[draft]
+
+    actual, stats = draft_generate(model.llm, inputs_embeds, draft_ids, max_new_tokens=40)
+    assert actual == expected
+    if draft == "greedy":
+        assert stats["accepted_tokens"] > 0
+        assert stats["decode_steps"] < greedy_stats["decode_steps"]
+
+
+def test_inference_matches_greedy(build_model):
+    model, kwargs = build_model()
+    kwargs = {**kwargs, "max_length": 40}
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(9600) * 0.1, torch.randn(4000) * 0.1]
+    keys = ["a", "b", "c"]
+
+    with torch.no_grad():
+        expected, _ = model.inference(waveforms, key=keys, batch_size=3, **kwargs)
+        actual, meta = model.inference(
+            waveforms, key=keys, batch_size=3, speculative=True, **kwargs
+        )
+    assert [r["text"] for r in actual] == [r["text"] for r in expected]
+    assert "speculative" in meta
@@ -0,0 +1,27 @@
+"""静态 KV 缓存测试
+
+验证使用预分配的静态 KV 缓存与编译后的解码步时，识别结果与动态缓存完全一致，
+形状相同的请求复用缓存池中的同一个缓存。
+
+用法:
+    python -m pytest asr/tests/test_static_cache.py
+"""
+
+import torch
+
+
+def test_static_cache_matches_dynamic(build_model):
+    model, kwargs = build_model()
+    kwargs = {**kwargs, "max_length": 40}
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(9600) * 0.1]
+    keys = ["a", "b"]
+
+    with torch.no_grad():
+        expected, _ = model.inference(waveforms, key=keys, batch_size=2, **kwargs)
+        for _ in range(2):
+            actual, _ = model.inference(
+                waveforms, key=keys, batch_size=2, static_cache=True, **kwargs
+            )
+            assert [r["text"] for r in actual] == [r["text"] for r in expected]
+    assert len(model.static_caches) == 1
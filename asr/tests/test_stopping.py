@@ -0,0 +1,55 @@
+"""LLM 生成提前终止测试
+
+验证默认只做重复循环检测，输出与关闭提前终止时完全一致；按时长的 token 上限需显式
+指定 tokens_per_second 才启用，到达 max_length 的正常截断不记为 "budget"。
+
+用法:
+    python -m pytest asr/tests/test_stopping.py
+"""
+
+import pytest
+import torch
+
+from stopping import EarlyStopping
+
+PATHS = [{}, {"speculative": True}, {"packing": True}]
+
+
+def transcribe(model, kwargs, **options):
+    torch.manual_seed(0)
+    waveforms = [torch.randn(16000) * 0.1, torch.randn(9600) * 0.1]
+    with torch.no_grad():
+        return model.inference(
+            waveforms, key=["a", "b"], batch_size=2, **{**kwargs, "max_length": 40, **options}
+        )
+
+
+@pytest.mark.parametrize("options", PATHS)
+def test_duration_budget_off_by_default(build_model, options):
+    model, kwargs = build_model()
+    expected, _ = transcribe(model, kwargs, early_stop=False)
+    actual, meta = transcribe(model, kwargs, **options)
+
+    assert [r["text"] for r in actual] == [r["text"] for r in expected]
+    assert all("early_stop" not in r for r in actual)
+    assert "early_stop" not in meta
+
+
+@pytest.mark.parametrize("options", PATHS)
+def test_duration_budget_opt_in(build_model, options):
+    model, kwargs = build_model()
+    expected, _ = transcribe(model, kwargs, early_stop=False)
+    actual, meta = transcribe(model, kwargs, tokens_per_second=1.0, **options)
+
+    assert [r["early_stop"] for r in actual] == ["budget", "budget"]
+    assert meta["early_stop"] == {"repetition": 0, "budget": 2}
+    for result, reference in zip(actual, expected):
+        assert len(result["text"]) < len(reference["text"])
+
+
+def test_max_length_truncation_not_budget():
+    stopping = EarlyStopping([4, 2], eos_token_ids={10}, max_length=4)
+    input_ids = torch.tensor([[1, 2, 3, 4], [5, 6, 7, 8]])
+
+    assert stopping(input_ids, None).tolist() == [True, True]
+    assert stopping.reasons == [None, "budget"]
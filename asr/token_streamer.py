@@ -0,0 +1,99 @@
+"""Fun-ASR 逐 token 文本输出
+
+LLM 每生成一个 token 就增量解码，把新确认的文本交给回调函数，
+语音助手可以在整句生成结束前拿到第一个词。
+
+增量解码时需要注意两类边界:
+- 字节级 BPE 中一个汉字可能被拆成多个 token，解码出的末尾是不完整的 UTF-8
+  （显示为 U+FFFD），此时等待后续 token；
+- 中日韩文字逐字输出，其他文字只输出到最后一个空格，避免把半个单词交给下游。
+
+下游不再需要后续文本时调用 stop()，下一次 put() 抛出 StreamStopped 中止生成。
+"""
+
+from transformers.generation.streamers import BaseStreamer
+
+
+class StreamStopped(Exception):
+    """TokenTextStreamer.stop() 之后继续生成时抛出，用于中止 generate"""
+
+
+def is_cjk_char(char: str) -> bool:
+    """是否为可以逐字输出的中日韩字符（含假名、谚文与全角标点）"""
+    cp = ord(char)
+    return (
+        0x4E00 <= cp <= 0x9FFF  # CJK 统一汉字
+        or 0x3400 <= cp <= 0x4DBF  # 扩展 A
+        or 0x20000 <= cp <= 0x2EBEF  # 扩展 B-F
+        or 0xF900 <= cp <= 0xFAFF  # 兼容汉字
+        or 0x3000 <= cp <= 0x30FF  # 全角标点、平假名、片假名
+        or 0xAC00 <= cp <= 0xD7AF  # 谚文音节
+        or 0xFF00 <= cp <= 0xFFEF  # 全角字符
+    )
+
+
+class TokenTextStreamer(BaseStreamer):
+    """把 generate 逐步产生的 token 增量解码为文本片段
+
+    只支持 batch 大小为 1，且调用 generate 时只传 inputs_embeds（没有需要跳过的提示词 token）。
+
+    Attributes:
+        text: 已输出的全部文本
+    """
+
+    def __init__(self, tokenizer, callback, skip_special_tokens: bool = True, normalize=None):
+        """初始化
+
+        Args:
+            tokenizer: LLM 分词器
+            callback: 回调函数，参数为新增的文本片段
+            skip_special_tokens: 解码时是否跳过特殊 token
+            normalize: 可选的文本规整函数（如 tools.utils.normalize_response），
+                作用于截止到输出边界（空白或中日韩字符之后）的已解码文本
+        """
+        self.tokenizer = tokenizer
+        self.callback = callback
+        self.skip_special_tokens = skip_special_tokens
+        self.normalize = normalize
+        self.token_cache = []
+        self.text = ""
+        self.stopped = False
+
+    def stop(self):
+        """请求停止生成，之后的 put() 抛出 StreamStopped"""
+        self.stopped = True
+
+    def put(self, value):
+        """接收新生成的 token（形状为 [1] 或 [1, n] 的张量，或 token 列表）"""
+        if self.stopped:
+            raise StreamStopped()
+        if hasattr(value, "dim"):
+            if value.dim() > 1 and value.shape[0] > 1:
+                raise ValueError("TokenTextStreamer 只支持 batch 大小为 1")
+            value = value.reshape(-1).tolist()
+        if not value:
+            return
+        self.token_cache.extend(value)
+        decoded = self.tokenizer.decode(self.token_cache, skip_special_tokens=self.skip_special_tokens)
+        if decoded.endswith("�"):
+            # 末尾是不完整的 UTF-8 字符
+            return
+        if decoded.endswith("\n") or (decoded and is_cjk_char(decoded[-1])):
+            end = len(decoded)
+        else:
+            end = decoded.rfind(" ") + 1
+        self._emit(decoded, end)
+
+    def end(self):
+        """生成结束，输出剩余文本"""
+        decoded = self.tokenizer.decode(self.token_cache, skip_special_tokens=self.skip_special_tokens)
+        self._emit(decoded.rstrip("�"), None)
+
+    def _emit(self, decoded: str, end):
+        decoded = decoded[:end]
+        if self.normalize is not None:
+            decoded = self.normalize(decoded)
+        piece = decoded[len(self.text) :]
+        if piece:
+            self.text += piece
+            self.callback(piece)